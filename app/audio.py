@@ -0,0 +1,62 @@
+# app/audio.py
+import math
+import struct
+import numpy as np
+
+# WAVE format tag
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+
+# sample_format -> (WAVE format tag, numpy dtype)
+SAMPLE_FORMATS = {
+    "float32": (WAVE_FORMAT_IEEE_FLOAT, np.dtype("<f4")),
+    "int16": (WAVE_FORMAT_PCM, np.dtype("<i2")),
+}
+
+# 스트리밍 시 전체 길이를 미리 알 수 없으므로 RIFF/data 크기에 최대값을 넣습니다.
+# (대부분의 디코더는 이 값을 "끝까지 읽기"로 처리합니다.)
+STREAMING_SIZE = 0xFFFFFFFF
+
+
+def wav_header(sample_rate: int, data_bytes: int = None, channels: int = 1, sample_format: str = "float32") -> bytes:
+    """
+    mono WAV 헤더를 만듭니다. sample_format 은 "float32" 또는 "int16".
+    data_bytes 가 None 이면 길이를 모르는 스트리밍용 헤더를 만듭니다.
+    """
+    format_tag, dtype = SAMPLE_FORMATS[sample_format]
+    bits = dtype.itemsize * 8
+    block_align = channels * dtype.itemsize
+    fmt = struct.pack("<HHIIHH", format_tag, channels, sample_rate,
+                      sample_rate * block_align, block_align, bits)
+    if data_bytes is None:
+        riff_size = data_size = STREAMING_SIZE
+    else:
+        data_size = data_bytes
+        riff_size = 4 + (8 + len(fmt)) + (8 + data_size)
+    return (b"RIFF" + struct.pack("<I", riff_size) + b"WAVE"
+            + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+            + b"data" + struct.pack("<I", data_size))
+
+
+def pcm_bytes(wav: np.ndarray, sample_format: str = "float32") -> memoryview:
+    """
+    waveform 을 little-endian PCM 으로 변환합니다.
+    float32 는 (이미 연속된 float32 배열이면) 복사 없이 버퍼를 그대로 돌려줍니다.
+    """
+    _, dtype = SAMPLE_FORMATS[sample_format]
+    if dtype.kind == "f":
+        pcm = np.ascontiguousarray(wav, dtype=dtype)
+    else:
+        scale = np.iinfo(dtype).max
+        pcm = np.empty(len(wav), dtype=dtype)
+        np.rint(np.clip(wav, -1.0, 1.0) * scale, out=pcm, casting="unsafe")
+    return memoryview(pcm).cast("B")
+
+
+def resample(wav: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """polyphase FIR 로 sample rate 를 바꿉니다. 같으면 그대로 반환합니다."""
+    if orig_sr == target_sr:
+        return wav
+    from scipy.signal import resample_poly  # 리샘플링 요청에서만 필요
+    g = math.gcd(orig_sr, target_sr)
+    return resample_poly(wav, target_sr // g, orig_sr // g).astype(np.float32, copy=False)
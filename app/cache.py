@@ -0,0 +1,180 @@
+# app/cache.py
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+def request_key(model, revision, voice_id, emotion, language, text) -> str:
+    """
+    합성 결과를 식별하는 key. 모델 이름이나 revision(version + 모델 파일 내용 hash)이 바뀌면 key 도 바뀌므로,
+    version 을 올리지 않고 모델 파일만 교체해도 이전 모델의 결과를 재사용하지 않습니다.
+    text 의 앞뒤/중복 공백은 정규화 단계에서 하나로 합쳐지므로 key 에서도 합칩니다.
+    """
+    normalized = " ".join(text.split())
+    payload = json.dumps([model, revision, voice_id, emotion, language, normalized], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """
+    합성 결과(waveform)를 요청 key 로 저장하는 LRU 캐시.
+
+    - 메모리 tier: 전체 바이트 수(max_bytes)로 제한하고, 가장 오래 사용하지 않은 항목부터 지웁니다.
+    - 디스크 tier (disk_dir 지정 시): WAV 파일로 저장해 프로세스를 재시작해도 재사용합니다.
+      disk_max_bytes 를 넘으면 가장 오래 사용하지 않은(mtime) 파일부터 지웁니다. 0 이면 제한 없음.
+      디스크 쓰기는 전용 스레드에서 처리하므로 put() 은 기다리지 않습니다.
+
+    max_bytes 가 0 이면 캐시를 사용하지 않습니다.
+    """
+    def __init__(self, max_bytes: int, disk_dir: str = None, disk_max_bytes: int = 0):
+        self.max_bytes = max(0, max_bytes)
+        self.disk_dir = disk_dir if (disk_dir and self.max_bytes > 0) else None
+        self.disk_max_bytes = max(0, disk_max_bytes)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (wav, sr)
+        self._bytes = 0
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._disk_evictions = 0
+        self._disk_bytes = 0
+        self._writer = None
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_bytes = sum(os.path.getsize(path) for path in self._disk_files())
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-cache")
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key):
+        """메모리 tier 에서 찾습니다. 없으면 None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+            elif self.disk_dir is None:
+                self._misses += 1
+            return entry
+
+    def load(self, key):
+        """디스크 tier 에서 찾아 메모리 tier 로 올립니다. 없으면 None. (파일 I/O 가 있으므로 이벤트 루프 밖에서 호출)"""
+        if self.disk_dir is None:
+            return None
+        from scipy.io import wavfile  # 디스크 tier 를 쓸 때만 필요 (import 가 무거움)
+        path = self._disk_path(key)
+        try:
+            sr, wav = wavfile.read(path)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self._misses += 1
+            return None
+        with self._lock:
+            self._disk_hits += 1
+        wav.setflags(write=False)
+        self._put_memory(key, wav, sr)
+        return wav, sr
+
+    def put(self, key, wav, sr):
+        if not self.enabled:
+            return
+        # 배치 결과의 view 일 수 있으므로 복사해서 보관합니다.
+        wav = np.array(wav, dtype=np.float32, copy=True)
+        wav.setflags(write=False)
+        self._put_memory(key, wav, sr)
+        if self._writer is not None:
+            self._writer.submit(self._write_disk, key, wav, sr)
+
+    def _put_memory(self, key, wav, sr):
+        if wav.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[0].nbytes
+            self._entries[key] = (wav, sr)
+            self._bytes += wav.nbytes
+            while self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self._evictions += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.wav")
+
+    def _disk_files(self):
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if name.endswith(".wav"):
+                    yield os.path.join(root, name)
+
+    def _write_disk(self, key, wav, sr):
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        from scipy.io import wavfile
+        wavfile.write(tmp, sr, wav)
+        os.replace(tmp, path)
+        with self._lock:
+            self._disk_bytes += os.path.getsize(path)
+        if self.disk_max_bytes and self._disk_bytes > self.disk_max_bytes:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        files = sorted(self._disk_files(), key=lambda path: os.path.getmtime(path))
+        for path in files:
+            if self._disk_bytes <= self.disk_max_bytes:
+                break
+            size = os.path.getsize(path)
+            os.remove(path)
+            with self._lock:
+                self._disk_bytes -= size
+                self._disk_evictions += 1
+
+    def purge(self, disk: bool = True) -> dict:
+        """캐시를 비우고 지운 항목 수를 반환합니다."""
+        with self._lock:
+            entries = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+        files = 0
+        if disk and self.disk_dir is not None:
+            for path in list(self._disk_files()):
+                os.remove(path)
+                files += 1
+            with self._lock:
+                self._disk_bytes = 0
+        return {"entries": entries, "disk_files": files}
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round((self._hits + self._disk_hits) / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "disk_bytes": self._disk_bytes if self.disk_dir else None,
+                "disk_evictions": self._disk_evictions,
+            }
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
@@ -8,5 +8,108 @@ PORT = int(os.getenv("PORT", 8000))
 
 # NCTTS 모델 경로
 MODEL_PATH = os.getenv("MODEL_PATH", "model/tts")
+# 한 프로세스에서 여러 모델을 함께 서비스할 때 "이름=경로" 목록 (예: "lite=model/lite,standard=model/standard")
+# 요청의 model 로 고르며, 생략하면 첫 번째 모델을 사용합니다. 비어 있으면 MODEL_PATH 하나만 "default" 로 서비스합니다.
+def _model_paths(value):
+    paths = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, sep, path = (part.strip() for part in item.partition("="))
+        if not sep or not name or not path:
+            raise ValueError(f"invalid MODEL_PATHS entry '{item.strip()}'. (expected name=path, e.g. lite=model/lite)")
+        if name in paths:
+            raise ValueError(f"duplicate model name '{name}' in MODEL_PATHS.")
+        paths[name] = path
+    return paths or {"default": MODEL_PATH}
+
+MODEL_PATHS = _model_paths(os.getenv("MODEL_PATHS", ""))
 
 MAX_TTS_TEXT_LEN = int(os.getenv("MAX_TTS_TEXT_LEN",400))
+
+# 합성 워커 풀 설정
+SYNTH_WORKERS = int(os.getenv("SYNTH_WORKERS", 1))          # 동시에 합성을 실행하는 워커 스레드 수
+SYNTH_QUEUE_SIZE = int(os.getenv("SYNTH_QUEUE_SIZE", 8))    # 워커를 기다릴 수 있는 최대 요청 수 (초과 시 503)
+SYNTH_RETRY_AFTER = int(os.getenv("SYNTH_RETRY_AFTER", 1))  # 대기열이 가득 찼을 때 Retry-After 헤더 값(초)
+
+# 마이크로 배칭 설정 (배치가 채워지려면 SYNTH_WORKERS >= SYNTH_BATCH_MAX_SIZE 여야 함)
+SYNTH_BATCH_MAX_SIZE = int(os.getenv("SYNTH_BATCH_MAX_SIZE", 1))        # 1 이하면 배칭하지 않음
+SYNTH_BATCH_WINDOW_MS = float(os.getenv("SYNTH_BATCH_WINDOW_MS", 5))    # 첫 요청 이후 배치를 모으는 최대 시간(ms)
+
+# /invocations/batch 설정
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 256))    # 요청 하나에 담을 수 있는 최대 항목 수
+BATCH_RUN_SIZE = int(os.getenv("BATCH_RUN_SIZE", 8))        # am/vocoder 를 한 번에 실행하는 최대 행 수
+
+# 파이프라인 단계별 동시 실행 수 (0 이면 제한 없음)
+# 예: SYNTH_WORKERS=3 과 각 단계 1 이면 한 요청의 vocoder 와 다음 요청의 frontend/am 이 겹쳐 실행됩니다.
+STAGE_FRONTEND_CONCURRENCY = int(os.getenv("STAGE_FRONTEND_CONCURRENCY", 0))
+STAGE_AM_CONCURRENCY = int(os.getenv("STAGE_AM_CONCURRENCY", 0))
+STAGE_VOCODER_CONCURRENCY = int(os.getenv("STAGE_VOCODER_CONCURRENCY", 0))
+
+# 클라이언트 연결 끊김을 확인하는 간격(초)
+DISCONNECT_POLL_INTERVAL = float(os.getenv("DISCONNECT_POLL_INTERVAL", 0.1))
+
+# 스트리밍 응답 설정
+STREAM_MAX_CHARS = int(os.getenv("STREAM_MAX_CHARS", 0))   # 0 보다 크면 이보다 긴 문장은 쉼표 등에서 한 번 더 나눠 스트리밍
+
+# vocoder 스트리밍 설정 (스트리밍 응답에서 문장 하나를 다시 mel window 단위로 나눠 vocoder 실행)
+VOCODER_STREAM_WINDOW = int(os.getenv("VOCODER_STREAM_WINDOW", 0))          # window 당 mel frame 수, 0 이면 문장 단위로만 스트리밍
+VOCODER_STREAM_CONTEXT = int(os.getenv("VOCODER_STREAM_CONTEXT", 8))        # window 양쪽에 덧붙이는 문맥 frame 수
+VOCODER_STREAM_CROSSFADE = int(os.getenv("VOCODER_STREAM_CROSSFADE", 256))  # 블록 경계 crossfade sample 수 (0 이면 hop 경계에서 자르기만 함)
+
+# am.onnx 입력 길이 bucket (symbol 수). 요청은 길이가 들어가는 가장 작은 bucket 까지만 padding 하고,
+# 가장 큰 bucket 보다 긴 입력은 문장/쉼표 단위로 나눠 합성합니다.
+SYNTH_LENGTH_BUCKETS = [int(b) for b in os.getenv("SYNTH_LENGTH_BUCKETS", "64,128,256,512,750").split(",") if b.strip()]
+
+# 합성 결과 캐시 설정
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_BYTES", 256 * 1024 * 1024))  # 메모리 tier 최대 바이트, 0 이면 캐시 사용 안 함
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", "")                                 # 디스크 tier 경로, 비어 있으면 사용 안 함
+AUDIO_CACHE_DISK_MAX_BYTES = int(os.getenv("AUDIO_CACHE_DISK_MAX_BYTES", 0))       # 디스크 tier 최대 바이트, 0 이면 제한 없음
+
+# 텍스트 처리(frontend) 결과 캐시 최대 항목 수, 0 이면 사용 안 함
+FRONTEND_CACHE_MAX_ENTRIES = int(os.getenv("FRONTEND_CACHE_MAX_ENTRIES", 10000))
+
+# ONNX Runtime 실행 프로파일: "gpu" (CUDA 필수) 또는 "cpu" (CPUExecutionProvider 만 사용)
+SYNTH_EXECUTION_PROFILE = os.getenv("SYNTH_EXECUTION_PROFILE", "gpu").lower()
+
+def _cpu_count():
+    # 컨테이너 등에서 사용할 수 있는 CPU 만 셉니다.
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+
+def _session_settings(prefix):
+    # 0 이면 ORT 기본값 사용
+    replicas = max(1, int(os.getenv(f"{prefix}_SESSION_REPLICAS", 1)))
+    intra_op_threads = int(os.getenv(f"{prefix}_INTRA_OP_THREADS", 0))
+    if intra_op_threads <= 0 and replicas > 1:
+        # 복제본마다 ORT 기본값(모든 코어)을 쓰면 코어 수보다 많은 스레드가 경쟁하므로 코어를 나눠 씁니다.
+        intra_op_threads = max(1, _cpu_count() // replicas)
+    return {
+        "intra_op_threads": intra_op_threads,
+        "inter_op_threads": int(os.getenv(f"{prefix}_INTER_OP_THREADS", 0)),
+        "execution_mode": os.getenv(f"{prefix}_EXECUTION_MODE", "sequential").lower(),   # sequential | parallel
+        "mem_arena": os.getenv(f"{prefix}_MEM_ARENA", "1") == "1",
+        "allow_spinning": os.getenv(f"{prefix}_ALLOW_SPINNING", "1") == "1",
+        # 세션 복제 수. 동시에 실행되려면 SYNTH_WORKERS 도 그만큼 있어야 하며, 보통 replicas * intra_op_threads <= 코어 수로 맞춥니다.
+        # (*_INTRA_OP_THREADS 를 지정하지 않으면 코어 수 // replicas)
+        "replicas": replicas,
+    }
+
+# am.onnx / vocoder.onnx 세션별 설정 (AM_*, VOC_* 환경변수)
+AM_SESSION_SETTINGS = _session_settings("AM")
+VOC_SESSION_SETTINGS = _session_settings("VOC")
+
+# 모델 정밀도: "fp32" (am.onnx, vocoder.onnx) 또는 "int8" (python -m nctts_onnx.quantize 로 만든 am.int8.onnx, vocoder.int8.onnx)
+AM_PRECISION = os.getenv("AM_PRECISION", "fp32").lower()
+VOC_PRECISION = os.getenv("VOC_PRECISION", "fp32").lower()
+
+# ORT 가 최적화한 그래프를 저장해 다음 시작 때 재사용하는 디렉터리, 비어 있으면 사용 안 함
+ORT_CACHE_DIR = os.getenv("ORT_CACHE_DIR", "")
+# 모델 로드 시 세션 생성과 언어별 TextProcessor 생성을 동시에 실행하는 스레드 수, 1 이면 순서대로 실행
+SYNTH_INIT_WORKERS = int(os.getenv("SYNTH_INIT_WORKERS", 4))
+
+# warm-up 문장 모음(json5) 경로. 비어 있으면 모델 디렉터리의 warmup.json5, 없으면 기본 문장 사용
+WARMUP_CORPUS = os.getenv("WARMUP_CORPUS", "")
+
+# 모델 hot reload 설정
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", 0))    # 0 보다 크면 이 간격(초)으로 MODEL_PATH 변경을 확인해 자동 reload
+MODEL_DRAIN_TIMEOUT = float(os.getenv("MODEL_DRAIN_TIMEOUT", 300))    # 교체된 모델의 진행 중 요청을 기다리는 최대 시간(초), 0 이면 무제한
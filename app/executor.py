@@ -0,0 +1,91 @@
+# app/executor.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFullError(Exception):
+    """합성 대기열이 가득 차서 요청을 받을 수 없는 경우"""
+
+
+class SynthExecutor:
+    """
+    합성 작업을 이벤트 루프 밖의 워커 스레드에서 실행합니다.
+    실행 중 + 대기 중인 작업 수가 (max_workers + max_queue) 에 도달하면
+    새 요청은 대기열에 넣지 않고 곧바로 QueueFullError 로 거절합니다.
+    """
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._capacity = self.max_workers + self.max_queue
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="synth")
+        self._lock = threading.Lock()
+        self._pending = 0   # 실행 중 + 대기 중
+        self._running = 0
+        self._rejected = 0
+        self._completed = 0
+
+    def _acquire(self):
+        with self._lock:
+            if self._pending >= self._capacity:
+                self._rejected += 1
+                raise QueueFullError(f"synthesis queue is full ({self._pending}/{self._capacity}).")
+            self._pending += 1
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+    def _call(self, fn, args, kwargs):
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        """fn 을 워커 스레드에서 실행하고 결과를 기다립니다. 대기열이 가득 차면 QueueFullError."""
+        self._acquire()
+        try:
+            future = self._pool.submit(self._call, fn, args, kwargs)
+        except BaseException:
+            self._release()
+            raise
+        # 슬롯은 클라이언트가 먼저 끊어도 워커가 실제로 끝난 뒤(또는 시작 전 취소된 뒤)에 반환합니다.
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def reserve(self):
+        """
+        스트리밍처럼 여러 번 나눠 실행하는 요청을 위해 슬롯 하나를 미리 확보합니다.
+        반환된 release 함수를 호출해야 슬롯이 반환됩니다. 대기열이 가득 차면 QueueFullError.
+        """
+        self._acquire()
+        released = []
+
+        def release():
+            if not released:
+                released.append(True)
+                self._release()
+        return release
+
+    async def run_reserved(self, fn, *args, **kwargs):
+        """reserve() 로 확보한 슬롯 안에서 fn 을 워커 스레드에서 실행합니다."""
+        return await asyncio.wrap_future(self._pool.submit(self._call, fn, args, kwargs))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "capacity": self._capacity,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "rejected": self._rejected,
+                "completed": self._completed,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
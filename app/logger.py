@@ -1,12 +1,17 @@
 # app/logger.py
 import logging
+import os
+import sys
 
 def setup_logger():
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
 
     if not logger.handlers:
-        console_handler = logging.StreamHandler()
+        # 텍스트 처리 중 native 출력을 숨기려고 fd 2 를 잠시 /dev/null 로 돌리는 동안에도
+        # 다른 스레드의 로그가 사라지지 않도록, 리다이렉트 전에 복제해 둔 원래 stderr 에 씁니다.
+        stream = os.fdopen(os.dup(sys.__stderr__.fileno()), "w", buffering=1)
+        console_handler = logging.StreamHandler(stream)
         formatter = logging.Formatter(
             "[%(asctime)s] [%(levelname)s] %(message)s",
             datefmt="%Y-%m-%d %H:%M:%S"
@@ -1,14 +1,28 @@
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Request, HTTPException, Header
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from logger import setup_logger  # setup_logger가 있는 모듈
-from const import API_VERSION, MODEL_PATH
-from schema import Reqinvocations
-from scipy.io.wavfile import write
+from const import API_VERSION, MODEL_PATHS, SYNTH_WORKERS, SYNTH_QUEUE_SIZE, SYNTH_RETRY_AFTER, VOCODER_STREAM_WINDOW
+from const import VOCODER_STREAM_CONTEXT, VOCODER_STREAM_CROSSFADE
+from const import AUDIO_CACHE_MAX_BYTES, AUDIO_CACHE_DIR, AUDIO_CACHE_DISK_MAX_BYTES, DISCONNECT_POLL_INTERVAL
+from const import MODEL_WATCH_INTERVAL, MODEL_DRAIN_TIMEOUT
+from schema import Reqinvocations, ReqinvocationsBatch
+from executor import SynthExecutor, QueueFullError
+from audio import wav_header, pcm_bytes, resample
+from cache import AudioCache, request_key
+from singleflight import SingleFlight
+from models import ModelSlot, ModelNotReadyError, model_dir_signature
+from nctts_onnx.cancel import CancelToken, SynthCancelled, call_with
+from contextlib import asynccontextmanager
+from typing import Optional
 from datetime import datetime
 import asyncio
-import time
 import io
+import os
+import json
+import zipfile
+import time
+import numpy as np
 # from .routers import inference
 
 # 로거 생성
@@ -18,24 +32,82 @@ Logger = setup_logger()
 
 async def lifespan(app: FastAPI):
     Logger.info(f"server initializing....")
-    # 모델 로드를 백그라운드로 실행
+    # 합성은 이벤트 루프가 아닌 워커 풀에서 실행 (/ping 등이 합성 중에도 응답하도록)
+    app.executor = SynthExecutor(max_workers=SYNTH_WORKERS, max_queue=SYNTH_QUEUE_SIZE)
+    # 같은 voice/emotion/language/text 는 같은 오디오가 나오므로 결과를 캐시
+    app.cache = AudioCache(AUDIO_CACHE_MAX_BYTES, disk_dir=AUDIO_CACHE_DIR, disk_max_bytes=AUDIO_CACHE_DISK_MAX_BYTES)
+    # 동시에 들어온 같은 요청은 한 번만 합성하고 결과를 공유
+    app.singleflight = SingleFlight()
+    # 연결 끊김/deadline 초과로 중단한 요청 수
+    app.cancelled = {"disconnected": 0, "expired": 0}
+    # 모델 로드를 백그라운드로 실행 (MODEL_PATHS 의 모델마다 slot 하나, 첫 번째가 기본 모델)
+    app.models = {name: ModelSlot(name, path) for name, path in MODEL_PATHS.items()}
+    app.default_model = next(iter(app.models))
     asyncio.create_task(init_model(app))
+    # MODEL_WATCH_INTERVAL 마다 모델 디렉터리를 확인해 바뀌면 hot reload
+    watchers = [asyncio.create_task(watch_model_dir(slot)) for slot in app.models.values()] if MODEL_WATCH_INTERVAL > 0 else []
     Logger.info("server started.")
     yield
+    for watcher in watchers:
+        watcher.cancel()
+    app.executor.shutdown()
+    app.cache.close()
     Logger.info(f"server stopped.")
     
-def load_model_sync(model_path):
+def load_model_sync(name, model_path):
     from nctts_onnx import synthesizer
-    return synthesizer.Syntheseizer(model_path=model_path)
+    return synthesizer.Syntheseizer(model_path=model_path, name=name)
     
 async def init_model(app: FastAPI):
-    Logger.info("model loading in background...")
+    Logger.info(f"model loading in background... ({', '.join(app.models)})")
+    for slot in app.models.values():
+        start_reload(slot, slot.path)
+
+def start_reload(slot: ModelSlot, path: str):
+    """백그라운드에서 새 모델을 로드(warm-up 포함)해 교체합니다. 이미 진행 중이면 False."""
+    if slot.reload["status"] == "loading":
+        return False
+    slot.reload.update(status="loading", path=path, started_at=datetime.now().isoformat(timespec="seconds"),
+                       finished_at=None, error=None)
+    asyncio.create_task(reload_model(slot, path))
+    return True
+
+async def reload_model(slot: ModelSlot, path: str):
+    start_time = time.time()
     try:
-        app.synthesizer = await asyncio.to_thread(load_model_sync, MODEL_PATH)
-        Logger.info("model loaded successfully!")
+        # 생성자에서 세션 생성, 텍스트 처리 초기화, warm-up 까지 끝납니다. 그동안 현재 모델이 계속 서비스합니다.
+        instance = await asyncio.to_thread(load_model_sync, slot.name, path)
     except Exception as e:
-        Logger.error("model load failed.")
-    
+        slot.reload.update(status="failed", error="model load failed.",
+                           finished_at=datetime.now().isoformat(timespec="seconds"))
+        Logger.error(f"model '{slot.name}' load failed." if slot.current is None else f"model '{slot.name}' reload failed. keep serving the current model.")
+        return
+    old = slot.swap(instance)
+    slot.path = path
+    slot.reload.update(status="done", version=instance.version, revision=instance.revision, finished_at=datetime.now().isoformat(timespec="seconds"))
+    if old is None:
+        Logger.info(f"model '{slot.name}' loaded successfully!")
+        return
+    Logger.info(f"model '{slot.name}' reloaded in {round(time.time() - start_time, 1)}s. (revision {old.revision} -> {instance.revision})")
+    # 진행 중인 요청은 이전 인스턴스에서 끝까지 실행하고, 모두 끝나면 해제
+    asyncio.create_task(slot.drain(old, timeout=MODEL_DRAIN_TIMEOUT or None))
+
+async def watch_model_dir(slot: ModelSlot):
+    signature = model_dir_signature(slot.path)
+    while True:
+        await asyncio.sleep(MODEL_WATCH_INTERVAL)
+        current = model_dir_signature(slot.path)
+        if current is None or current == signature:
+            continue
+        # 파일을 복사하는 중일 수 있으므로 한 주기 동안 더 바뀌지 않을 때 reload
+        await asyncio.sleep(MODEL_WATCH_INTERVAL)
+        if model_dir_signature(slot.path) != current:
+            continue
+        signature = current
+        Logger.info(f"model '{slot.name}' directory changed: {slot.path}")
+        if not start_reload(slot, slot.path):
+            Logger.warning(f"model '{slot.name}' reload already in progress, skipped.")
+
         
 app = FastAPI(
     lifespan=lifespan,
@@ -50,28 +122,357 @@ async def ping():
     """
     return {"status": "OK"}
 
-@app.post("/invocations")
-async def invocations(req:Reqinvocations):
-    if not hasattr(app, "synthesizer"):
+@app.get("/metrics")
+async def metrics():
+    """
+    Runtime statistics of the synthesis workers and the model.
+    """
+    return {"executor": app.executor.stats(),
+            "cache": app.cache.stats(),
+            "singleflight": app.singleflight.stats(),
+            "cancelled_requests": dict(app.cancelled),
+            "default_model": app.default_model,
+            "models": {name: {**slot.stats(), "synthesizer": slot.current.stats() if slot.ready else None}
+                       for name, slot in app.models.items()}}
+
+@app.post("/cache/purge")
+async def purge_cache(disk: bool = True):
+    """
+    Drop every cached synthesis result (and the on-disk tier when disk=true).
+    """
+    purged = await asyncio.to_thread(app.cache.purge, disk)
+    Logger.info(f"/cache/purge - {purged}")
+    return purged
+
+@app.post("/admin/reload", status_code=202)
+async def admin_reload(model: Optional[str] = None, model_path: Optional[str] = None):
+    """
+    Build a new instance of model (default: the first hosted model) from model_path
+    (default: its current model directory) in the background, warm it up and swap it in.
+    In-flight requests finish on the old instance.
+    """
+    slot = get_slot(model)
+    path = model_path or slot.path
+    if not os.path.isfile(os.path.join(path, "config.json5")):
+        raise HTTPException(status_code=400, detail=f"config.json5 not found in '{path}'.")
+    if not start_reload(slot, path):
+        raise HTTPException(status_code=409, detail=f"A reload of model '{slot.name}' is already in progress.")
+    Logger.info(f"/admin/reload - Started. ({slot.name}: {path})")
+    return slot.reload
+
+@app.get("/admin/reload")
+async def admin_reload_status(model: Optional[str] = None):
+    """
+    Status of the last (re)load of model (default: the first hosted model).
+    """
+    return get_slot(model).reload
+
+def get_slot(name):
+    """요청의 model 이름에 해당하는 slot. 생략하면 기본(첫 번째) 모델입니다."""
+    slot = app.models.get(name or app.default_model)
+    if slot is None:
+        raise HTTPException(status_code=400, detail=f"Unknown model '{name}'. Available: {', '.join(app.models)}")
+    return slot
+
+def acquire_model(name, token: CancelToken):
+    """요청한 모델의 현재 인스턴스와 release 함수. 교체되더라도 release 전까지는 이 인스턴스를 해제하지 않습니다."""
+    try:
+        return get_slot(name).acquire()
+    except HTTPException:
+        token.close()
+        raise
+    except ModelNotReadyError:
+        token.close()
         # 503 code: Service Unavailable
         raise HTTPException(status_code=503, detail="Model is still loading. Try again later.")
+
+class ClosingStreamingResponse(StreamingResponse):
+    """응답이 어떻게 끝나든(body 를 한 번도 읽지 않은 연결 끊김, http.response.start 실패 포함) on_close 를 호출합니다."""
+    def __init__(self, content, on_close, **kwargs):
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.on_close()
+
+def queue_full_error():
+    # 503 code: 대기열 포화. 클라이언트가 잠시 후 재시도하도록 Retry-After 전달
+    return HTTPException(status_code=503, detail="Server is busy. Try again later.",
+                         headers={"Retry-After": str(SYNTH_RETRY_AFTER)})
+
+def audio_media_type(container):
+    return "audio/wav" if container == "wav" else "application/octet-stream"
+
+def audio_headers(req: Reqinvocations, sample_rate):
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    return {"Content-Disposition": f'attachment; filename="{timestamp}.{req.container}"',
+            "X-Sample-Rate": str(sample_rate),
+            "X-Sample-Format": req.sample_format}
+
+def encode_audio(req, wav, sr):
+    """요청한 sample rate/format 으로 변환한 PCM 버퍼. (캐시에는 모델 출력 그대로 보관)"""
+    return pcm_bytes(resample(wav, sr, req.sample_rate or sr), req.sample_format)
+
+def request_token(deadline_ms):
+    """X-Request-Deadline-Ms (요청을 받은 시점부터의 ms) 로 취소 token 을 만듭니다."""
+    if deadline_ms is None:
+        return CancelToken()
+    if deadline_ms <= 0:
+        raise HTTPException(status_code=400, detail="X-Request-Deadline-Ms must be a positive integer.")
+    return CancelToken(timeout=deadline_ms / 1000.0)
+
+@asynccontextmanager
+async def watch_disconnect(request: Request, token: CancelToken):
+    """요청을 처리하는 동안 클라이언트 연결이 끊기면 token 을 취소합니다."""
+    async def poll():
+        while not token.cancelled:
+            if await request.is_disconnected():
+                token.cancel("disconnected")
+                return
+            await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+    watcher = asyncio.create_task(poll())
+    try:
+        yield
+    finally:
+        watcher.cancel()
+        token.close()
+
+def cancelled_error(path, e: SynthCancelled):
+    app.cancelled[e.reason] = app.cancelled.get(e.reason, 0) + 1
+    Logger.warning(f"{path} - Cancelled. ({e.reason})")
+    if e.reason == "expired":
+        # 504 code: deadline 초과
+        return HTTPException(status_code=504, detail="Request deadline exceeded.")
+    # 499 code: 클라이언트가 먼저 연결을 끊음 (응답은 전달되지 않음)
+    return HTTPException(status_code=499, detail="Client closed request.")
+
+async def cache_lookup(key):
+    """메모리 → 디스크 순서로 캐시를 찾습니다. 없으면 None."""
+    cached = app.cache.get(key)
+    if cached is None and app.cache.disk_dir is not None:
+        cached = await asyncio.to_thread(app.cache.load, key)
+    return cached
+
+async def synthesize(synthesizer, voice_id, language, text, emotion, token: CancelToken = None):
+    """
+    캐시에 없을 때만 워커 풀에서 합성합니다.
+    같은 key 의 합성이 이미 진행 중이면 새로 실행하지 않고 그 결과(오류 포함)를 함께 받습니다.
+    token 이 취소되면 기다리지 않고 SynthCancelled 를 냅니다.
+    """
+    key = request_key(synthesizer.name, synthesizer.revision, voice_id, emotion, language, text)
+    cached = await cache_lookup(key)
+    if cached is not None:
+        return cached
+    return await app.singleflight.do(key, synthesize_uncached, synthesizer, key, voice_id, language, text, emotion, token=token)
+
+async def synthesize_uncached(synthesizer, key, voice_id, language, text, emotion, token: CancelToken = None):
+    wav, sr = await app.executor.run(call_with, token, synthesizer.infer, voice_id, language, text, emotion)
+    app.cache.put(key, wav, sr)
+    return wav, sr
+
+@app.post("/invocations")
+async def invocations(req:Reqinvocations, request: Request,
+                      x_request_deadline_ms: Optional[int] = Header(None, description="Give up if the audio is not ready within this many milliseconds")):
+    token = request_token(x_request_deadline_ms)
+    synthesizer, release = acquire_model(req.model, token)
+    if req.stream:
+        return stream_invocations(req, synthesizer, token, release)
     try:
         start_time = time.time()
-        wav, sr = app.synthesizer.infer(req.voice_id, req.language, req.text, req.emotion)
-        buf = io.BytesIO()
-        write(buf, sr, wav)
-        buf.seek(0)
+        async with watch_disconnect(request, token):
+            wav, sr = await synthesize(synthesizer, req.voice_id, req.language, req.text, req.emotion, token=token)
+        out_sr = req.sample_rate or sr
+        if out_sr != sr:
+            # 리샘플링은 CPU 작업이므로 이벤트 루프 밖에서 실행
+            data = await asyncio.to_thread(encode_audio, req, wav, sr)
+        else:
+            data = encode_audio(req, wav, sr)
+        # BytesIO 로 한 번 더 복사하지 않고 헤더와 샘플 버퍼를 그대로 내보냅니다.
+        chunks = [wav_header(out_sr, data.nbytes, sample_format=req.sample_format), data] if req.container == "wav" else [data]
         latency = round(time.time() - start_time, 3)  # 초 단위, 소수 3자리
         Logger.info(f"/invocations - Completed.")
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        headers = audio_headers(req, out_sr)
+        headers["Content-Length"] = str(sum(len(chunk) for chunk in chunks))
         return StreamingResponse(
-                    buf,
-                    media_type="audio/wav",
-                    headers={"Content-Disposition": f'attachment; filename="{timestamp}.wav"'}
+                    iter(chunks),
+                    media_type=audio_media_type(req.container),
+                    headers=headers
                 )
+    except QueueFullError:
+        Logger.warning(f"/invocations - Rejected. synthesis queue is full.")
+        raise queue_full_error()
+    except SynthCancelled as e:
+        raise cancelled_error("/invocations", e)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         e_msg = str(e)
         Logger.error(f"/invocations - Internal Server Error")
-        raise HTTPException(status_code=500, detail="Internal Server Error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    finally:
+        release()
+
+@app.post("/invocations/batch")
+async def invocations_batch(req: ReqinvocationsBatch, request: Request,
+                            x_request_deadline_ms: Optional[int] = Header(None, description="Give up if the archive is not ready within this many milliseconds")):
+    """
+    Synthesize many lines in one request.
+    Returns a zip archive with one audio file per successful item and a manifest.json with per-item status.
+    """
+    token = request_token(x_request_deadline_ms)
+    synthesizer, release = acquire_model(req.model, token)
+    try:
+        return await synthesize_batch(req, request, synthesizer, token)
+    finally:
+        release()
+
+async def synthesize_batch(req: ReqinvocationsBatch, request: Request, synthesizer, token: CancelToken):
+    start_time = time.time()
+    keys = [request_key(synthesizer.name, synthesizer.revision, item.voice_id, item.emotion, item.language, item.text) for item in req.items]
+    results = [await cache_lookup(key) for key in keys]
+    misses = [i for i, result in enumerate(results) if result is None]
+    if not misses:
+        token.close()
+    else:
+        try:
+            # 캐시에 없는 항목만 워커 슬롯 하나에서 bucket 별 배치로 합성
+            async with watch_disconnect(request, token):
+                synthesized = await app.executor.run(call_with, token, synthesizer.infer_batch,
+                    [(req.items[i].voice_id, req.items[i].language, req.items[i].text, req.items[i].emotion) for i in misses])
+        except QueueFullError:
+            Logger.warning(f"/invocations/batch - Rejected. synthesis queue is full.")
+            raise queue_full_error()
+        except SynthCancelled as e:
+            raise cancelled_error("/invocations/batch", e)
+        except Exception as e:
+            Logger.error(f"/invocations/batch - Internal Server Error")
+            raise HTTPException(status_code=500, detail="Internal Server Error")
+        for i, result in zip(misses, synthesized):
+            if not isinstance(result, Exception):
+                app.cache.put(keys[i], *result)
+            results[i] = result
+    body = await asyncio.to_thread(build_batch_archive, req, results)
+    failed = sum(isinstance(result, Exception) for result in results)
+    Logger.info(f"/invocations/batch - Completed. ({len(results) - failed}/{len(results)} ok, {round(time.time() - start_time, 3)}s)")
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    return Response(content=body, media_type="application/zip",
+                    headers={"Content-Disposition": f'attachment; filename="{timestamp}.zip"'})
+
+def build_batch_archive(req: ReqinvocationsBatch, results):
+    """항목별 오디오 파일과 manifest.json 을 담은 zip (오디오는 압축 효과가 적으므로 STORED)"""
+    manifest = []
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_STORED) as archive:
+        for i, (item, result) in enumerate(zip(req.items, results)):
+            entry = {"index": i, "id": item.id}
+            if isinstance(result, ValueError):
+                entry.update(status="invalid", error=str(result))
+            elif isinstance(result, Exception):
+                entry.update(status="error", error="Internal Server Error")
+            else:
+                wav, sr = result
+                out_sr = req.sample_rate or sr
+                data = encode_audio(req, wav, sr)
+                name = f"{i:04d}.{req.container}"
+                with archive.open(name, "w") as f:
+                    if req.container == "wav":
+                        f.write(wav_header(out_sr, data.nbytes, sample_format=req.sample_format))
+                    f.write(data)
+                entry.update(status="ok", file=name, sample_rate=out_sr,
+                             duration=round(len(wav) / sr, 3))
+            manifest.append(entry)
+        archive.writestr("manifest.json", json.dumps({"sample_format": req.sample_format, "items": manifest},
+                                                     ensure_ascii=False, indent=2))
+    return buf.getvalue()
+
+def stream_invocations(req: Reqinvocations, synthesizer, token: CancelToken, release_model):
+    """
+    문장 단위로 합성하면서 완성되는 순서대로 오디오를 내보냅니다.
+    WAV 는 길이를 모르는 스트리밍용 헤더를 먼저 보내고, 이후 PCM 데이터만 이어 보냅니다.
+    응답이 시작된 뒤에는 상태 코드를 바꿀 수 없으므로, 도중에 실패하면 로그를 남기고 스트림을 끝냅니다.
+    클라이언트가 끊으면 StreamingResponse 가 스트림을 취소하므로, 그때 진행 중인 합성도 token 으로 중단합니다.
+    """
+    try:
+        pieces = synthesizer.split_for_stream(req.voice_id, req.language, req.text, req.emotion)
+    except ValueError as e:
+        token.close()
+        release_model()
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        # 요청 하나가 워커 슬롯 하나를 스트림이 끝날 때까지 사용합니다.
+        release = app.executor.reserve()
+    except QueueFullError:
+        token.close()
+        release_model()
+        Logger.warning(f"/invocations - Rejected. synthesis queue is full.")
+        raise queue_full_error()
+
+    out_sr = req.sample_rate or synthesizer.sample_rate
+    resampling = out_sr != synthesizer.sample_rate
+
+    state = {"finished": False, "closed": False}
+
+    def close_stream():
+        """워커 슬롯, 모델 참조, token 을 한 번만 반환합니다. (generator 의 finally 와 응답 종료 양쪽에서 호출)"""
+        if state["closed"]:
+            return
+        state["closed"] = True
+        if not state["finished"]:
+            # 스트림이 도중에(또는 시작도 하기 전에) 취소됨 (클라이언트 연결 끊김)
+            token.cancel("disconnected")
+            app.cancelled["disconnected"] += 1
+            Logger.warning(f"/invocations - Cancelled. (disconnected)")
+        token.close()
+        release()
+        release_model()
+
+    async def audio_stream():
+        try:
+            if req.container == "wav":
+                yield wav_header(out_sr, sample_format=req.sample_format)
+            windowed = VOCODER_STREAM_WINDOW > 0 and not resampling
+            window_revision = f"{synthesizer.revision}/window-{VOCODER_STREAM_WINDOW}-{VOCODER_STREAM_CONTEXT}-{VOCODER_STREAM_CROSSFADE}"
+            for piece in pieces:
+                token.check()
+                key = request_key(synthesizer.name, synthesizer.revision, req.voice_id, req.emotion, req.language, piece)
+                cached = await cache_lookup(key)
+                if cached is None and windowed:
+                    # window 단위 vocoder 결과는 한 번에 실행한 결과와 조금 다르므로 window 설정을 넣은 별도 key 에 둡니다.
+                    key = request_key(synthesizer.name, window_revision, req.voice_id, req.emotion, req.language, piece)
+                    cached = await cache_lookup(key)
+                if cached is not None:
+                    yield await asyncio.to_thread(encode_audio, req, *cached) if resampling else encode_audio(req, *cached)
+                elif windowed:
+                    # 문장 안에서도 vocoder window 단위로 완성된 블록부터 내보냅니다.
+                    blocks, done = synthesizer.infer_blocks(req.voice_id, req.language, piece, req.emotion), []
+                    while (block := await app.executor.run_reserved(call_with, token, next, blocks, None)) is not None:
+                        done.append(block)
+                        yield pcm_bytes(block, req.sample_format)
+                    app.cache.put(key, np.concatenate(done), synthesizer.sample_rate)
+                else:
+                    # 리샘플링할 때는 블록 경계에서 필터가 끊기지 않도록 문장 단위로 변환합니다.
+                    wav, sr = await app.executor.run_reserved(call_with, token, synthesizer.infer, req.voice_id, req.language, piece, req.emotion)
+                    app.cache.put(key, wav, sr)
+                    yield await asyncio.to_thread(encode_audio, req, wav, sr) if resampling else encode_audio(req, wav, sr)
+            Logger.info(f"/invocations - Completed. (stream, {len(pieces)} pieces)")
+            state["finished"] = True
+        except SynthCancelled as e:
+            cancelled_error("/invocations", e)
+            state["finished"] = True
+        except Exception as e:
+            Logger.error(f"/invocations - Internal Server Error while streaming")
+            state["finished"] = True
+        finally:
+            close_stream()
+
+    # body 를 읽기 전에 연결이 끊기면 generator 가 시작되지 않아 finally 가 실행되지 않으므로,
+    # 응답이 끝날 때도 close_stream 을 호출합니다.
+    return ClosingStreamingResponse(
+                audio_stream(),
+                on_close=close_stream,
+                media_type=audio_media_type(req.container),
+                headers=audio_headers(req, out_sr)
+            )
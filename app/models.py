@@ -0,0 +1,95 @@
+# app/models.py
+import asyncio
+import os
+import time
+from logger import setup_logger
+
+# 로거 생성
+Logger = setup_logger()
+
+# 모델 디렉터리 변경 감지에 사용하는 파일 (config + 모든 onnx 변형)
+WATCHED_SUFFIXES = (".json5", ".onnx")
+
+
+class ModelNotReadyError(Exception):
+    """아직 로드된 모델이 없는 경우"""
+
+
+class ModelSlot:
+    """
+    서비스 중인 Syntheseizer 하나와 교체(hot reload) 상태.
+
+    - acquire() 로 요청이 사용하는 인스턴스의 참조 수를 셉니다.
+    - swap() 은 새 인스턴스로 즉시 바꾸고, 진행 중인 요청은 이전 인스턴스에서 끝까지 실행됩니다.
+    - drain() 은 이전 인스턴스의 참조가 0 이 될 때까지 기다렸다가 close() 합니다.
+    이벤트 루프 안에서만 사용합니다. (lock 불필요)
+    """
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self.current = None
+        self._refs = {}   # id(instance) -> 참조 수
+        self.reload = {"status": "idle", "path": path, "started_at": None, "finished_at": None,
+                       "version": None, "revision": None, "error": None}
+
+    @property
+    def ready(self) -> bool:
+        return self.current is not None
+
+    def acquire(self):
+        """현재 인스턴스와 release 함수를 반환합니다. (스트리밍처럼 응답이 끝날 때 반환해야 하는 경우)"""
+        instance = self.current
+        if instance is None:
+            raise ModelNotReadyError(f"model '{self.name}' is still loading.")
+        self._refs[id(instance)] = self._refs.get(id(instance), 0) + 1
+        released = []
+
+        def release():
+            if not released:
+                released.append(True)
+                # 0 이 되면 항목을 지웁니다. release 가 instance 를 잡고 있으므로 그 전에 id() 가 재사용되지 않습니다.
+                count = self._refs.get(id(instance), 0) - 1
+                if count > 0:
+                    self._refs[id(instance)] = count
+                else:
+                    self._refs.pop(id(instance), None)
+        return instance, release
+
+    def refs(self, instance) -> int:
+        return self._refs.get(id(instance), 0)
+
+    def swap(self, instance):
+        """새 인스턴스로 교체하고 이전 인스턴스를 반환합니다."""
+        old, self.current = self.current, instance
+        return old
+
+    async def drain(self, old, timeout: float = None, interval: float = 0.1):
+        """이전 인스턴스의 요청이 모두 끝나면(또는 timeout) 자원을 해제합니다."""
+        start = time.monotonic()
+        while self.refs(old) > 0:
+            if timeout and time.monotonic() - start >= timeout:
+                Logger.warning(f"model '{self.name}': {self.refs(old)} requests still running on the old instance after {timeout}s, releasing anyway.")
+                break
+            await asyncio.sleep(interval)
+        # timeout 으로 먼저 해제해도 남은 요청의 release() 가 참조 수를 정리합니다.
+        await asyncio.to_thread(old.close)
+        Logger.info(f"model '{self.name}': old instance (version {old.version}) released after {time.monotonic() - start:.1f}s.")
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "version": self.current.version if self.current is not None else None,
+            "revision": self.current.revision if self.current is not None else None,
+            "in_use": self.refs(self.current) if self.current is not None else 0,
+            "reload": dict(self.reload),
+        }
+
+
+def model_dir_signature(path: str):
+    """모델 디렉터리의 (파일명, 크기, 수정 시각) 목록. 바뀌면 hot reload 대상입니다."""
+    try:
+        names = sorted(name for name in os.listdir(path) if name.endswith(WATCHED_SUFFIXES))
+        return tuple((name, os.path.getsize(os.path.join(path, name)), os.path.getmtime(os.path.join(path, name)))
+                     for name in names)
+    except OSError:
+        return None
@@ -0,0 +1,107 @@
+# app/nctts_onnx/batcher.py
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+
+class MicroBatcher:
+    """
+    동시에 들어온 합성 요청을 짧은 시간(window) 동안 모아 am.onnx / vocoder.onnx 를 한 번에 실행합니다.
+
+    - 첫 요청이 도착한 시점부터 window_ms 가 지나거나 max_batch_size 개가 모이면 배치를 실행합니다.
+    - 같은 key 를 가진 요청끼리만 하나의 배치로 묶습니다.
+    - run_batch(items) 는 items 와 같은 순서로 결과 리스트를 반환해야 합니다.
+      배치 실행이 실패하면 요청을 하나씩 다시 실행해 문제가 된 요청만 실패시킵니다.
+    """
+    def __init__(self, run_batch: Callable[[List], List], max_batch_size: int, window_ms: float, name: str = "batcher"):
+        self._run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = max(0.0, window_ms) / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._size_hist = {}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item, key=None) -> Future:
+        future = Future()
+        self._queue.put((key, item, future, time.perf_counter()))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+
+    def _loop(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = first[3] + self.window
+            closing = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is None:
+                    closing = True
+                    break
+                batch.append(entry)
+            groups = {}
+            for entry in batch:
+                groups.setdefault(entry[0], []).append(entry)
+            for group in groups.values():
+                self._dispatch(group)
+            if closing:
+                return
+
+    def _dispatch(self, group):
+        group = [entry for entry in group if entry[2].set_running_or_notify_cancel()]
+        if not group:
+            return
+        started = time.perf_counter()
+        try:
+            results = self._run_batch([entry[1] for entry in group])
+            for entry, result in zip(group, results):
+                entry[2].set_result(result)
+        except Exception as e:
+            if len(group) == 1:
+                group[0][2].set_exception(e)
+            else:
+                for entry in group:
+                    try:
+                        entry[2].set_result(self._run_batch([entry[1]])[0])
+                    except Exception as item_e:
+                        entry[2].set_exception(item_e)
+        self._record(len(group), [started - entry[3] for entry in group])
+
+    def _record(self, size, waits):
+        with self._lock:
+            self._batches += 1
+            self._requests += size
+            self._size_hist[size] = self._size_hist.get(size, 0) + 1
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "window_ms": self.window * 1000.0,
+                "batches": self._batches,
+                "requests": self._requests,
+                "mean_batch_size": round(self._requests / self._batches, 3) if self._batches else 0.0,
+                "batch_size_hist": dict(sorted(self._size_hist.items())),
+                "mean_wait_ms": round(self._wait_total / self._requests * 1000.0, 3) if self._requests else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000.0, 3),
+            }
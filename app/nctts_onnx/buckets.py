@@ -0,0 +1,50 @@
+# app/nctts_onnx/buckets.py
+import threading
+from typing import List
+
+
+class InputTooLongError(ValueError):
+    """frontend 결과가 가장 큰 length bucket 보다 긴 경우"""
+    def __init__(self, length: int, limit: int):
+        self.length = length
+        self.limit = limit
+        super().__init__(f"Input text too long after text processing ({length} > {limit} symbols).")
+
+
+class LengthBuckets:
+    """
+    am.onnx 입력 길이 bucket.
+    각 요청(배치)은 전체 길이가 들어가는 가장 작은 bucket 길이까지만 padding 합니다.
+    """
+    def __init__(self, lengths: List[int]):
+        self.lengths = sorted(set(int(length) for length in lengths if int(length) > 0))
+        assert self.lengths, "at least one length bucket is required."
+        self.max_length = self.lengths[-1]
+        self._lock = threading.Lock()
+        self._stats = {length: {"hits": 0, "runs": 0, "total_ms": 0.0, "max_ms": 0.0} for length in self.lengths}
+
+    def select(self, length: int) -> int:
+        for bucket in self.lengths:
+            if length <= bucket:
+                return bucket
+        raise InputTooLongError(length, self.max_length)
+
+    def record(self, bucket: int, rows: int, elapsed: float):
+        with self._lock:
+            stat = self._stats[bucket]
+            stat["hits"] += rows
+            stat["runs"] += 1
+            stat["total_ms"] += elapsed * 1000.0
+            stat["max_ms"] = max(stat["max_ms"], elapsed * 1000.0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                str(bucket): {
+                    "hits": stat["hits"],
+                    "runs": stat["runs"],
+                    "mean_ms": round(stat["total_ms"] / stat["runs"], 3) if stat["runs"] else 0.0,
+                    "max_ms": round(stat["max_ms"], 3),
+                }
+                for bucket, stat in self._stats.items()
+            }
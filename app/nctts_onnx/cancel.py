@@ -0,0 +1,185 @@
+# app/nctts_onnx/cancel.py
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+
+
+class SynthCancelled(Exception):
+    """요청이 취소되었거나(클라이언트 연결 끊김 등) deadline 이 지나 합성을 중단한 경우"""
+    def __init__(self, reason: str):
+        self.reason = reason
+        super().__init__(f"synthesis {reason}.")
+
+
+_stats_lock = threading.Lock()
+_stats = {"dropped": 0, "aborted_runs": 0}
+
+
+class CancelToken:
+    """
+    요청 하나의 취소 상태.
+
+    - cancel(reason) 을 호출하거나 timeout(초) 이 지나면("expired") 취소됩니다.
+      이벤트 루프 안에서 만들면 deadline 을 루프의 call_later 로 걸고(요청마다 타이머 스레드를 만들지 않음),
+      루프 밖에서 만들면 check() 에서 deadline 을 확인합니다.
+    - 취소되면 실행 중인 ORT run 의 RunOptions.terminate 를 켜서 sess_am/sess_voc 실행을 중단시킵니다.
+    - 아직 시작하지 않은 작업은 check() 에서 SynthCancelled 로 버립니다.
+    """
+    def __init__(self, timeout: float = None):
+        self._lock = threading.Lock()
+        self.reason = None
+        self._callbacks = []
+        self._run_options = set()
+        self._loop = None
+        self._timer = None
+        self.deadline = None
+        if timeout is not None:
+            self.deadline = time.monotonic() + timeout
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            if loop is not None:
+                self._loop = loop
+                self._timer = loop.call_later(max(0.0, timeout), self.cancel, "expired")
+
+    @property
+    def cancelled(self) -> bool:
+        return self.reason is not None
+
+    def cancel(self, reason: str = "cancelled"):
+        with self._lock:
+            if self.reason is not None:
+                return
+            self.reason = reason
+            callbacks = list(self._callbacks)
+            run_options = list(self._run_options)
+        for options in run_options:
+            options.terminate = True
+        for callback in callbacks:
+            callback(reason)
+
+    def add_callback(self, callback):
+        """취소될 때 callback(reason) 을 호출합니다. 이미 취소되었으면 바로 호출합니다."""
+        with self._lock:
+            if self.reason is None:
+                self._callbacks.append(callback)
+                return
+        callback(self.reason)
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def check(self):
+        """취소되었거나 deadline 이 지났으면 SynthCancelled"""
+        if self.reason is None and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("expired")
+        if self.reason is not None:
+            with _stats_lock:
+                _stats["dropped"] += 1
+            raise SynthCancelled(self.reason)
+
+    @contextmanager
+    def run_options(self):
+        import onnxruntime as ort  # main 을 import 할 때 onnxruntime 까지 올리지 않도록 사용 시점에 import
+        options = ort.RunOptions()
+        with self._lock:
+            options.terminate = self.reason is not None
+            self._run_options.add(options)
+        try:
+            yield options
+        except Exception:
+            if self.reason is not None:
+                with _stats_lock:
+                    _stats["aborted_runs"] += 1
+                raise SynthCancelled(self.reason)
+            raise
+        finally:
+            with self._lock:
+                self._run_options.discard(options)
+
+    def close(self):
+        # TimerHandle.cancel() 은 루프 스레드에서만 안전하므로, 다른 스레드에서 닫으면 루프에 넘깁니다.
+        if self._timer is not None:
+            timer, self._timer = self._timer, None
+            try:
+                in_loop = asyncio.get_running_loop() is self._loop
+            except RuntimeError:
+                in_loop = False
+            if in_loop:
+                timer.cancel()
+            elif not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(timer.cancel)
+
+
+# 워커 스레드에서 실행 중인 요청의 token (synthesizer 내부 함수 시그니처를 바꾸지 않고 전달)
+_local = threading.local()
+
+
+@contextmanager
+def bind(token: CancelToken):
+    previous = getattr(_local, "token", None)
+    _local.token = token
+    try:
+        yield
+    finally:
+        _local.token = previous
+
+
+def current() -> CancelToken:
+    return getattr(_local, "token", None)
+
+
+def call_with(token: CancelToken, fn, *args):
+    """token 을 현재 스레드에 묶은 채 fn 을 실행합니다. (executor 에 넘길 때 사용)"""
+    with bind(token):
+        return fn(*args)
+
+
+def check():
+    token = current()
+    if token is not None:
+        token.check()
+
+
+@contextmanager
+def run_options():
+    """현재 token 의 RunOptions. token 이 없으면 None (ORT 기본값)"""
+    token = current()
+    if token is None:
+        yield None
+        return
+    token.check()
+    with token.run_options() as options:
+        yield options
+
+
+async def wait_or_cancel(awaitable, token: CancelToken):
+    """awaitable 의 결과를 기다리다가 token 이 먼저 취소되면 SynthCancelled. (awaitable 자체는 취소하지 않음)"""
+    if token is None:
+        return await awaitable
+    loop = asyncio.get_running_loop()
+    cancelled = loop.create_future()
+
+    def on_cancel(reason):
+        loop.call_soon_threadsafe(lambda: cancelled.done() or cancelled.set_result(reason))
+    token.add_callback(on_cancel)
+    task = asyncio.ensure_future(awaitable)
+    try:
+        done, _ = await asyncio.wait({task, cancelled}, return_when=asyncio.FIRST_COMPLETED)
+        if task in done:
+            return task.result()
+        # 기다리지 않게 된 결과의 예외는 여기서 소비 (미처리 예외 경고 방지)
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        raise SynthCancelled(cancelled.result())
+    finally:
+        token.remove_callback(on_cancel)
+        cancelled.cancel()
+
+
+def stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
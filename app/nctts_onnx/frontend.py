@@ -0,0 +1,75 @@
+# app/nctts_onnx/frontend.py
+import sys
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from logger import setup_logger
+from nctts_onnx.frontend_cache import params_digest
+from nctp.text_processor import TextProcessor, MultiTextProcessor
+
+# 로거 생성
+Logger = setup_logger()
+
+# nctp_params digest -> MultiTextProcessor
+# 사용하는 Syntheseizer 가 모두 해제되면 함께 사라집니다. (hot reload 로 교체된 모델 포함)
+_shared = weakref.WeakValueDictionary()
+_lock = threading.Lock()    # _shared, _build_locks, _stats
+_build_locks = {}           # digest -> 그 구성을 만드는 동안 잡는 lock
+_stats = {"built": 0, "shared": 0}
+
+
+def build_text_processor(nctp_params: dict, workers: int = 1) -> MultiTextProcessor:
+    """
+    언어별 TextProcessor 를 만듭니다. workers > 1 이면 언어들을 동시에 만듭니다.
+    (MeCab, BERT, g2p_en 로드는 대부분 파일 I/O 나 GIL 을 놓는 native 코드)
+    """
+    def build(k, v):
+        start = time.perf_counter()
+        proc = TextProcessor(language=v['language'], normalize_step=v['normalize_step'] if type(v['normalize_step']) is str or type(v['normalize_step']) is list else list(v['normalize_step']), use_g2p=v['use_g2p'])
+        Logger.info(f"text processor '{k}' built in {time.perf_counter() - start:.2f}s.")
+        return proc
+
+    if workers > 1 and len(nctp_params) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(nctp_params)), thread_name_prefix="nctp-init") as pool:
+            procs = dict(zip(nctp_params, pool.map(build, nctp_params, nctp_params.values())))
+    else:
+        procs = {k: build(k, v) for k, v in nctp_params.items()}
+    return MultiTextProcessor(procs)
+
+
+def shared_text_processor(nctp_params: dict, workers: int = 1):
+    """
+    nctp_params 가 같은 모델 디렉터리(예: Lite / Standard)는 MultiTextProcessor 하나를 함께 사용합니다.
+    MeCab tagger, g2p_en, BERT prosody 모델 등이 모델마다 따로 올라가지 않습니다.
+    (MultiTextProcessor, digest) 를 반환합니다.
+    """
+    digest = params_digest(nctp_params)
+    # 같은 구성을 동시에 두 번 만들지 않도록 digest 별 lock 안에서 만듭니다.
+    # 다른 구성(다른 모델)의 생성이나 reload 는 기다리지 않습니다.
+    with _lock:
+        build_lock = _build_locks.setdefault(digest, threading.Lock())
+    with build_lock:
+        with _lock:
+            m_proc = _shared.get(digest)
+            if m_proc is not None:
+                _stats["shared"] += 1
+        if m_proc is not None:
+            Logger.info(f"text processor shared. (nctp_params {digest[:8]})")
+            return m_proc, digest
+        m_proc = build_text_processor(nctp_params, workers)
+        with _lock:
+            _shared[digest] = m_proc
+            _stats["built"] += 1
+            # 이후 요청은 _shared 에서 찾으므로 lock 은 더 필요 없습니다. (실패하면 남겨 두어 재시도도 한 번씩만 실행)
+            if _build_locks.get(digest) is build_lock:
+                del _build_locks[digest]
+        return m_proc, digest
+
+
+def stats() -> dict:
+    # 생성 중인 동안 /metrics 가 기다리지 않도록 생성 lock 을 잡지 않습니다.
+    # 대만어 G2PW 준비 상태는 대만어 TextProcessor 를 만든 경우에만(모듈이 import 된 경우) 보고합니다.
+    handler = sys.modules.get("nctp.ncg2pt.taiwanese_handler")
+    return {"instances": len(_shared), **_stats,
+            "g2pw": handler.g2pw_status() if handler is not None else None}
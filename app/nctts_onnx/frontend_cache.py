@@ -0,0 +1,76 @@
+# app/nctts_onnx/frontend_cache.py
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from const import FRONTEND_CACHE_MAX_ENTRIES
+
+
+def params_digest(nctp_params: dict) -> str:
+    """
+    MultiTextProcessor 는 등록된 전체 언어 구성으로 symbol id offset 을 정하므로,
+    한 언어의 결과라도 config 의 nctp_params 전체가 같아야 재사용할 수 있습니다.
+    """
+    return hashlib.sha1(json.dumps(nctp_params, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class FrontendCache:
+    """
+    텍스트 처리(parse → input2symbol → split_punc/tone/style_tag) 결과 LRU 캐시.
+    결과 배열은 voice/emotion 과 무관하므로 모든 voice 가 공유하고, 읽기 전용으로 보관합니다.
+    max_entries 가 0 이면 캐시를 사용하지 않습니다.
+    """
+    def __init__(self, max_entries: int):
+        self.max_entries = max(0, max_entries)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> {'texts', 'puncs', 'tone', 'styletag'}
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def make_key(digest: str, language: str, text: str):
+        return (digest, language, text)
+
+    def get(self, key):
+        if self.max_entries == 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self._hits += 1
+            return entry
+
+    def put(self, key, arrays: dict):
+        if self.max_entries == 0:
+            return
+        for array in arrays.values():
+            array.setflags(write=False)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= sum(a.nbytes for a in old.values())
+            self._entries[key] = arrays
+            self._bytes += sum(a.nbytes for a in arrays.values())
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= sum(a.nbytes for a in evicted.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# 프로세스 전체에서 공유 (key 에 nctp_params digest 가 있으므로 모델이 여러 개여도 섞이지 않음)
+frontend_cache = FrontendCache(FRONTEND_CACHE_MAX_ENTRIES)
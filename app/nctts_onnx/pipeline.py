@@ -0,0 +1,64 @@
+# app/nctts_onnx/pipeline.py
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Stage:
+    """
+    합성 파이프라인의 한 단계(frontend / am / vocoder) 동시 실행 제한과 대기열 통계.
+
+    워커 스레드는 각 단계에 들어갈 때 슬롯을 기다리고, 나올 때 반환합니다.
+    단계마다 슬롯 수를 작게 두고 SYNTH_WORKERS 를 단계 수 이상으로 두면
+    요청 N 이 vocoder 를 실행하는 동안 요청 N+1 은 frontend/am 을 실행하는 식으로 단계가 겹칩니다.
+    concurrency 가 0 이하이면 제한하지 않고 통계만 냅니다.
+    """
+    def __init__(self, name: str, concurrency: int = 0):
+        self.name = name
+        self.concurrency = max(0, concurrency)
+        self._slots = threading.BoundedSemaphore(self.concurrency) if self.concurrency > 0 else None
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._active = 0
+        self._max_waiting = 0
+        self._entered = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._busy_total = 0.0
+
+    @contextmanager
+    def run(self):
+        start = time.perf_counter()
+        with self._lock:
+            self._waiting += 1
+            self._max_waiting = max(self._max_waiting, self._waiting)
+        if self._slots is not None:
+            self._slots.acquire()
+        entered = time.perf_counter()
+        with self._lock:
+            self._waiting -= 1
+            self._active += 1
+            self._entered += 1
+            self._wait_total += entered - start
+            self._wait_max = max(self._wait_max, entered - start)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._busy_total += time.perf_counter() - entered
+            if self._slots is not None:
+                self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "concurrency": self.concurrency or None,
+                "active": self._active,
+                "waiting": self._waiting,
+                "max_waiting": self._max_waiting,
+                "entered": self._entered,
+                "mean_wait_ms": round(self._wait_total / self._entered * 1000.0, 3) if self._entered else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000.0, 3),
+                "mean_busy_ms": round(self._busy_total / self._entered * 1000.0, 3) if self._entered else 0.0,
+            }
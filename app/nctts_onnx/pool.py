@@ -0,0 +1,87 @@
+# app/nctts_onnx/pool.py
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import List
+import onnxruntime as ort
+from nctts_onnx.binding import BoundSession
+
+
+class SessionPool:
+    """
+    같은 모델의 InferenceSession 복제본(replica) 풀.
+    요청은 빈 replica 하나를 빌려(checkout) 실행하고 돌려주므로, 여러 요청이 각자의 intra-op thread pool 로 동시에 실행됩니다.
+    입력 버퍼는 replica 와 무관하므로 첫 replica 의 (스레드별) 버퍼를 공유합니다.
+    BoundSession 과 같은 buffer()/run()/stats() 를 제공합니다.
+    """
+    def __init__(self, replicas: List[BoundSession]):
+        assert replicas, "at least one session replica is required."
+        self.replicas = replicas
+        self.sess = replicas[0].sess
+        self.output_names = replicas[0].output_names
+        self._idle = queue.LifoQueue()   # 최근에 쓴 replica 를 먼저 써서 캐시/arena 를 따뜻하게 유지
+        for replica in replicas:
+            self._idle.put(replica)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._checkouts = 0
+        self._waited = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def buffer(self, name: str, shape: tuple):
+        return self.replicas[0].buffer(name, shape)
+
+    @contextmanager
+    def checkout(self):
+        start = time.perf_counter()
+        try:
+            replica = self._idle.get_nowait()
+            waited = False
+        except queue.Empty:
+            replica = self._idle.get()
+            waited = True
+        wait = time.perf_counter() - start
+        with self._lock:
+            self._checkouts += 1
+            if waited:
+                self._waited += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+        try:
+            yield replica
+        finally:
+            self._idle.put(replica)
+
+    @contextmanager
+    def pinned(self, replica: BoundSession):
+        """
+        현재 스레드의 run() 이 풀을 거치지 않고 replica 로 실행되게 합니다.
+        warm-up 처럼 모든 replica 를 차례로 실행해야 할 때 사용합니다. (LIFO 풀은 같은 replica 만 돌려줌)
+        """
+        self._local.pinned = replica
+        try:
+            yield replica
+        finally:
+            self._local.pinned = None
+
+    def run(self, inputs: dict, run_options: ort.RunOptions = None) -> list:
+        pinned = getattr(self._local, "pinned", None)
+        if pinned is not None:
+            return pinned.run(inputs, run_options)
+        with self.checkout() as replica:
+            return replica.run(inputs, run_options)
+
+    def stats(self) -> dict:
+        buffers = self.replicas[0].stats()
+        with self._lock:
+            return {
+                "replicas": len(self.replicas),
+                "idle": self._idle.qsize(),
+                "checkouts": self._checkouts,
+                "waited": self._waited,
+                "mean_wait_ms": round(self._wait_total / self._checkouts * 1000.0, 3) if self._checkouts else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000.0, 3),
+                **buffers,
+            }
@@ -0,0 +1,129 @@
+# app/nctts_onnx/quantize.py
+"""
+am.onnx / vocoder.onnx 의 INT8 dynamic quantization 모델을 만들고 fp32 와 비교합니다.
+
+    python -m nctts_onnx.quantize --model_path model/tts
+    python -m nctts_onnx.quantize --models vocoder --skip_eval
+
+결과는 MODEL_PATH 에 am.int8.onnx, vocoder.int8.onnx 로 저장되며,
+AM_PRECISION=int8 / VOC_PRECISION=int8 로 서버에서 선택합니다.
+
+평가는 고정된 문장 세트로 모델별 실행 시간(speedup)과 fp32 대비 오디오 차이(log-spectral distance, dB)를 출력합니다.
+- am      : int8 am + fp32 vocoder vs fp32 am + fp32 vocoder
+- vocoder : fp32 am + int8 vocoder vs fp32 am + fp32 vocoder
+- both    : int8 am + int8 vocoder
+int8 am 은 duration 이 달라져 길이가 바뀔 수 있으므로, 짧은 쪽 길이에 맞춰 비교합니다.
+"""
+import argparse
+import os
+import time
+import numpy as np
+import onnxruntime as ort
+from const import MODEL_PATH, SYNTH_EXECUTION_PROFILE, AM_SESSION_SETTINGS, VOC_SESSION_SETTINGS
+from nctts_onnx.binding import BoundSession
+from nctts_onnx.session import execution_providers, session_options, model_file
+
+# 언어(nctp language)별 평가 문장. config 에 있는 언어만 사용합니다.
+TEST_SENTENCES = {
+    "korean": [
+        "안녕하세요, 오늘 날씨가 참 좋네요.",
+        "그림자왕? 리세온? 무슨 말이야? 난... 그냥... 난 누구인지도 몰라.",
+        "이 망토도, 이 단검도 모두 낯설기만 해. 우리는 내일 아침 일찍 북쪽 성문으로 출발한다.",
+    ],
+    "english": [
+        "Hello, how are you today?",
+        "How are things with you lately? I'd love to hear what you've been up to.",
+        "The northern gate opens at dawn, so get some rest while you still can.",
+    ],
+    "japanese": [
+        "こんにちは、今日はいい天気ですね。",
+        "明日の朝早く、北の城門から出発します。",
+    ],
+    "chinese": [
+        "你好，今天天气很好。",
+        "我们明天一早从北门出发。",
+    ],
+    "taiwanese": [
+        "你好，今天天氣很好。",
+        "我們明天一早從北門出發。",
+    ],
+}
+
+
+def quantize(model_path, name, per_channel=False):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    src, dst = model_file(model_path, name, "fp32"), model_file(model_path, name, "int8")
+    start = time.perf_counter()
+    quantize_dynamic(src, dst, weight_type=QuantType.QInt8, per_channel=per_channel)
+    print(f"{name}: {os.path.getsize(src) / 2**20:.1f} MiB -> {os.path.getsize(dst) / 2**20:.1f} MiB "
+          f"({time.perf_counter() - start:.1f}s) {dst}")
+
+
+def log_spectral_distance(ref, out, n_fft=2048, hop=512, eps=1e-10):
+    """두 waveform 의 log power spectrum 차이 RMS(dB) 를 frame 평균한 값"""
+    from scipy.signal import stft
+    n = min(len(ref), len(out))
+    _, _, spec_ref = stft(ref[:n], nperseg=n_fft, noverlap=n_fft - hop)
+    _, _, spec_out = stft(out[:n], nperseg=n_fft, noverlap=n_fft - hop)
+    diff = 10 * np.log10(np.abs(spec_ref) ** 2 + eps) - 10 * np.log10(np.abs(spec_out) ** 2 + eps)
+    return float(np.mean(np.sqrt(np.mean(diff ** 2, axis=0))))
+
+
+def evaluate(synth, voice_id, repeat):
+    providers = execution_providers(SYNTH_EXECUTION_PROFILE)
+    settings = {"am": AM_SESSION_SETTINGS, "vocoder": VOC_SESSION_SETTINGS}
+    sessions = {name: {p: BoundSession(ort.InferenceSession(model_file(synth.model_path, name, p), sess_options=session_options(settings[name]), providers=providers))
+                       for p in ("fp32", "int8") if os.path.exists(model_file(synth.model_path, name, p))}
+                for name in ("am", "vocoder")}
+    voice = synth.voices[voice_id]["emotion"]["neutral"]
+    feats = []
+    for lang_code, lang in synth.languages.items():
+        for text in TEST_SENTENCES.get(lang["language"], []):
+            feats.append(synth._frontend(voice, lang_code, text))
+    if not feats:
+        raise SystemExit("no test sentences for the configured languages.")
+
+    def run(am, voc):
+        synth.am, synth.voc = sessions["am"][am], sessions["vocoder"][voc]
+        wavs, am_time, voc_time = [], 0.0, 0.0
+        for f in feats:
+            best_am, best_voc = float("inf"), float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                mels, frames = synth._run_am([f])
+                mid = time.perf_counter()
+                wav = synth._run_vocoder(mels[:, :, :frames[0]])[0]
+                best_am, best_voc = min(best_am, mid - start), min(best_voc, time.perf_counter() - mid)
+            am_time, voc_time = am_time + best_am, voc_time + best_voc
+            wavs.append(wav[:frames[0] * synth.hop_length])
+        return wavs, am_time, voc_time
+
+    ref, ref_am, ref_voc = run("fp32", "fp32")
+    print(f"{len(feats)} sentences, profile={SYNTH_EXECUTION_PROFILE}, best of {repeat}")
+    print(f"{'variant':>8} {'am_ms':>9} {'am_x':>6} {'voc_ms':>9} {'voc_x':>6} {'lsd_db':>8}")
+    print(f"{'fp32':>8} {ref_am * 1000:>9.1f} {1.0:>6.2f} {ref_voc * 1000:>9.1f} {1.0:>6.2f} {0.0:>8.3f}")
+    for label, am, voc in (("am", "int8", "fp32"), ("vocoder", "fp32", "int8"), ("both", "int8", "int8")):
+        if am not in sessions["am"] or voc not in sessions["vocoder"]:
+            continue  # 양자화하지 않은 모델
+        wavs, am_time, voc_time = run(am, voc)
+        lsd = np.mean([log_spectral_distance(r, w) for r, w in zip(ref, wavs)])
+        print(f"{label:>8} {am_time * 1000:>9.1f} {ref_am / am_time:>6.2f} {voc_time * 1000:>9.1f} {ref_voc / voc_time:>6.2f} {lsd:>8.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="INT8 dynamic quantization of am.onnx / vocoder.onnx")
+    parser.add_argument("--model_path", default=MODEL_PATH)
+    parser.add_argument("--models", default="am,vocoder", help="comma separated: am,vocoder")
+    parser.add_argument("--per_channel", action="store_true", help="per-channel weight quantization")
+    parser.add_argument("--skip_eval", action="store_true")
+    parser.add_argument("--voice_id", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for name in args.models.split(","):
+        quantize(args.model_path, name.strip(), args.per_channel)
+    if not args.skip_eval:
+        # fp32 로 로드한 뒤 평가에서 세션을 바꿔 가며 실행합니다.
+        from nctts_onnx.synthesizer import Syntheseizer
+        synth = Syntheseizer(model_path=args.model_path)
+        evaluate(synth, args.voice_id or next(iter(synth.voices)), args.repeat)
@@ -0,0 +1,88 @@
+# app/nctts_onnx/segment.py
+import re
+from typing import List
+
+# 문장 끝으로 보지 않는 영어 약어 ("Mr. Kim" 의 '.' 뒤에서 자르지 않음)
+ABBREVIATIONS = ("Mr", "Mrs", "Ms", "Dr", "Prof", "St", "Jr", "Sr", "vs", "e.g", "i.e")
+_NOT_ABBREVIATION = "".join(rf"(?<!\b{re.escape(abbr)}\.)" for abbr in ABBREVIATIONS)
+# 문장부호가 이어지거나 닫는 따옴표/괄호가 오면 그 뒤에서 자릅니다.
+_NOT_CONTINUED = r"(?![.!?~,;:。！？…，、；：」』）”’])"
+# 문장 끝 문장부호(연속 가능) 뒤에서 자릅니다.
+# 전각 문장부호는 뒤에 공백이 없어도(중국어/일본어), 반각 문장부호는 공백이 있을 때만 자릅니다.
+SENTENCE_END = re.compile(rf"(?<=[。！？…]){_NOT_CONTINUED}\s*|(?<=[。！？…][」』）”’]){_NOT_CONTINUED}\s*"
+                          rf"|{_NOT_ABBREVIATION}(?<=[.!?~🐢])\s+")
+# 쉼표 등 문장 중간 문장부호 뒤 (긴 문장을 더 잘게 나눌 때만 사용)
+CLAUSE_END = re.compile(rf"(?<=[，、；：]){_NOT_CONTINUED}\s*|(?<=[,;:])\s+")
+# [l]...[/l] 형태의 style tag
+TAG = re.compile(r"\[(\/?)(\w)\]")
+WORD = re.compile(r"\w")
+# 공백 없이 잘린 조각(전각 문장부호 뒤)은 다시 합칠 때도 공백 없이 붙입니다.
+FULL_WIDTH_END = re.compile(r"[。！？…，、；：」』）”’]$")
+
+
+def _concat(left: str, right: str) -> str:
+    return f"{left}{right}" if FULL_WIDTH_END.search(left) else f"{left} {right}"
+
+
+def _tag_depth(text: str) -> int:
+    depth = 0
+    for m in TAG.finditer(text):
+        depth += -1 if m.group(1) else 1
+    return depth
+
+
+def _join_open_tags(pieces: List[str]) -> List[str]:
+    """style tag 가 열린 채로 잘린 조각은 태그가 닫힐 때까지 다음 조각과 합칩니다."""
+    joined = []
+    buf = ""
+    for piece in pieces:
+        buf = _concat(buf, piece) if buf else piece
+        if _tag_depth(buf) <= 0:
+            joined.append(buf)
+            buf = ""
+    if buf:
+        joined.append(buf)
+    return joined
+
+
+def _join_empty(pieces: List[str]) -> List[str]:
+    """'...' 처럼 읽을 글자가 없는 조각은 앞 조각에, 맨 앞이면 다음 조각에 붙입니다."""
+    joined = []
+    head = ""
+    for piece in pieces:
+        if not WORD.search(TAG.sub("", piece)):
+            if joined:
+                joined[-1] = _concat(joined[-1], piece)
+            else:
+                head = _concat(head, piece) if head else piece
+        elif head:
+            joined.append(_concat(head, piece))
+            head = ""
+        else:
+            joined.append(piece)
+    if head:
+        joined.append(head)
+    return joined
+
+
+def split_sentences(text: str, max_chars: int = 0) -> List[str]:
+    """
+    스트리밍 합성을 위해 텍스트를 문장 단위로 나눕니다.
+
+    Args:
+        text (str): 입력 문장
+        max_chars (int): 0 보다 크면 이보다 긴 문장은 쉼표 등 문장 중간 부호에서 한 번 더 나눕니다.
+
+    Returns:
+        pieces (list): 순서대로 합성할 문장 조각. 모두 이어 붙이면 공백을 제외하고 원문과 같습니다.
+
+    Examples:
+        >>> split_sentences("안녕? [l]하하. 하[/l] 반가워!")
+        ['안녕?', '[l]하하. 하[/l] 반가워!']
+    """
+    pieces = [p.strip() for p in SENTENCE_END.split(text.strip()) if p.strip()]
+    if max_chars > 0:
+        pieces = [c.strip() for p in pieces
+                  for c in (CLAUSE_END.split(p) if len(p) > max_chars else [p]) if c.strip()]
+    pieces = _join_empty(_join_open_tags(pieces))
+    return pieces if pieces else [text]
@@ -0,0 +1,180 @@
+# app/nctts_onnx/session.py
+import glob
+import hashlib
+import json
+import os
+import platform
+import threading
+import time
+import onnxruntime as ort
+from logger import setup_logger
+
+# 로거 생성
+Logger = setup_logger()
+
+EXECUTION_PROFILES = ("gpu", "cpu")
+PRECISIONS = ("fp32", "int8")
+
+
+def model_file(model_path: str, name: str, precision: str = "fp32") -> str:
+    """MODEL_PATH 안의 모델 파일 경로. int8 은 양자화 도구가 원본 옆에 만든 <name>.int8.onnx"""
+    if precision == "fp32":
+        return os.path.join(model_path, f"{name}.onnx")
+    if precision == "int8":
+        return os.path.join(model_path, f"{name}.int8.onnx")
+    raise ValueError(f"unknown precision '{precision}'. (one of {', '.join(PRECISIONS)})")
+
+
+def execution_providers(profile: str) -> list:
+    """실행 프로파일에 맞는 ORT provider 목록"""
+    if profile == "gpu":
+        return [
+            ("CUDAExecutionProvider", {"device_id": 0}),  # 0번 GPU
+            "CPUExecutionProvider"                        # 실패시 CPU fallback
+        ]
+    if profile == "cpu":
+        return ["CPUExecutionProvider"]
+    raise ValueError(f"unknown execution profile '{profile}'. (one of {', '.join(EXECUTION_PROFILES)})")
+
+
+def session_options(settings: dict) -> ort.SessionOptions:
+    """
+    const 의 *_SESSION_SETTINGS 로 SessionOptions 를 만듭니다.
+    thread 수가 0 이면 ORT 기본값(물리 코어 수)을 그대로 사용합니다.
+    """
+    so = ort.SessionOptions()
+    so.log_severity_level = 3 # 로그 ERROR 이상만 출력
+    so.log_verbosity_level = 0
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if settings["intra_op_threads"] > 0:
+        so.intra_op_num_threads = settings["intra_op_threads"]
+    if settings["inter_op_threads"] > 0:
+        so.inter_op_num_threads = settings["inter_op_threads"]
+    if settings["execution_mode"] == "parallel":
+        so.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+    elif settings["execution_mode"] == "sequential":
+        so.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    else:
+        raise ValueError(f"unknown execution mode '{settings['execution_mode']}'. (sequential or parallel)")
+    so.enable_cpu_mem_arena = settings["mem_arena"]
+    # 요청 사이에 worker thread 가 busy-wait 하지 않도록 끌 수 있습니다. (CPU 를 여러 프로세스가 나눠 쓸 때)
+    spinning = "1" if settings["allow_spinning"] else "0"
+    so.add_session_config_entry("session.intra_op.allow_spinning", spinning)
+    so.add_session_config_entry("session.inter_op.allow_spinning", spinning)
+    return so
+
+
+def describe(settings: dict) -> str:
+    return ", ".join(f"{k}={v}" for k, v in settings.items())
+
+
+# (절대 경로, mtime, 크기) -> [lock, sha256]. 복제본 세션마다 같은 파일을 다시 읽지 않도록 한 번만 계산합니다.
+_sha_lock = threading.Lock()
+_sha_cache = {}
+
+
+def file_sha256(path: str) -> str:
+    """
+    파일 내용의 sha256. 파일이 바뀌지 않았으면(mtime, 크기) 이전 결과를 그대로 반환하고,
+    여러 스레드가 같은 파일을 동시에 요청하면 한 스레드만 계산합니다.
+    """
+    stat = os.stat(path)
+    source = os.path.abspath(path)
+    key = (source, stat.st_mtime_ns, stat.st_size)
+    with _sha_lock:
+        entry = _sha_cache.get(key)
+        if entry is None:
+            # 같은 경로의 이전 항목(교체 전 파일)은 지웁니다.
+            for stale in [k for k in _sha_cache if k[0] == source]:
+                del _sha_cache[stale]
+            entry = _sha_cache[key] = [threading.Lock(), None]
+    with entry[0]:
+        if entry[1] is None:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+            entry[1] = digest.hexdigest()
+        return entry[1]
+
+
+_platform = None
+
+
+def platform_fingerprint() -> dict:
+    """
+    ORT_ENABLE_ALL 로 최적화한 그래프에는 현재 CPU 에 맞춘 kernel/layout 이 들어가므로,
+    캐시 디렉터리를 다른 CPU 의 호스트와 공유해도 섞이지 않도록 CPU 아키텍처와 명령어 집합을 key 에 넣습니다.
+    """
+    global _platform
+    if _platform is None:
+        flags = ""
+        try:
+            with open("/proc/cpuinfo") as f:
+                for line in f:
+                    # x86: flags, ARM: Features
+                    if line.startswith(("flags", "Features")):
+                        flags = " ".join(sorted(line.split(":", 1)[1].split()))
+                        break
+        except OSError:
+            pass
+        _platform = {"machine": platform.machine(), "processor": platform.processor(), "cpu_flags": flags}
+    return _platform
+
+
+def create_session(path: str, settings: dict, providers: list, cache_dir: str = None) -> ort.InferenceSession:
+    """
+    InferenceSession 을 만듭니다. cache_dir 가 있으면 ORT 가 최적화한 그래프를 저장해 두고,
+    다음 시작부터는 최적화를 건너뛰고 저장된 그래프를 로드합니다.
+
+    최적화 결과는 모델 내용, ORT 버전, provider, CPU 에 따라 달라지므로 모두 합친 hash 를 key 로 씁니다.
+    캐시 파일을 로드하지 못하면(손상 등) 지우고 원본 모델로 다시 만듭니다.
+    """
+    if not cache_dir:
+        return ort.InferenceSession(path, sess_options=session_options(settings), providers=providers)
+    start = time.perf_counter()
+    provider_names = [p[0] if isinstance(p, tuple) else p for p in providers]
+    key = hashlib.sha256(json.dumps([file_sha256(path), ort.__version__, provider_names, platform_fingerprint()]).encode("utf-8")).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(path))[0]
+    # 여러 모델 디렉터리가 같은 cache_dir 를 써도 서로의 항목을 지우지 않도록 원본 경로별로 구분
+    prefix = f"{name}-{hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()[:8]}"
+    cached = os.path.join(cache_dir, f"{prefix}-{key}.onnx")
+    meta_path = f"{cached}.json"
+    if os.path.exists(cached):
+        so = session_options(settings)
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL  # 이미 최적화된 그래프
+        try:
+            sess = ort.InferenceSession(cached, sess_options=so, providers=providers)
+            elapsed = time.perf_counter() - start
+            try:
+                with open(meta_path) as f:
+                    saved = json.load(f)["optimize_seconds"] - elapsed
+                Logger.info(f"{name}: optimized graph cache hit. loaded in {elapsed:.2f}s (saved {saved:.2f}s)")
+            except (OSError, ValueError, KeyError):
+                Logger.info(f"{name}: optimized graph cache hit. loaded in {elapsed:.2f}s")
+            return sess
+        except Exception as e:
+            Logger.warning(f"{name}: optimized graph cache entry is unusable, rebuilding from the original model.")
+            for stale in (cached, meta_path):
+                if os.path.exists(stale):
+                    os.remove(stale)
+    os.makedirs(cache_dir, exist_ok=True)
+    so = session_options(settings)
+    tmp = f"{cached}.{os.getpid()}.{threading.get_ident()}.tmp"
+    so.optimized_model_filepath = tmp
+    sess = ort.InferenceSession(path, sess_options=so, providers=providers)
+    elapsed = time.perf_counter() - start
+    try:
+        os.replace(tmp, cached)
+        with open(meta_path, "w") as f:
+            json.dump({"source": os.path.abspath(path), "ort_version": ort.__version__,
+                       "providers": provider_names, "machine": platform_fingerprint()["machine"],
+                       "optimize_seconds": elapsed}, f)
+        # 같은 원본 모델의 이전 key 항목은 더 이상 쓰이지 않으므로 정리
+        for stale in glob.glob(os.path.join(cache_dir, f"{prefix}-*.onnx*")):
+            if not stale.startswith(cached):
+                os.remove(stale)
+        Logger.info(f"{name}: optimized graph cached in {elapsed:.2f}s -> {cached}")
+    except OSError as e:
+        Logger.warning(f"{name}: failed to write optimized graph cache.")
+    return sess
@@ -0,0 +1,134 @@
+# app/nctts_onnx/startup.py
+"""
+텍스트 처리(nctp) 초기화 비용과 import 시간 측정.
+
+    python -m nctts_onnx.startup --model_path model/tts --keys korean
+    python -m nctts_onnx.startup --importtime main,nctp --check
+
+첫 번째는 nctp import, nctp_params 로 MultiTextProcessor 생성 각각의 소요 시간과 RSS 증가량,
+그리고 무거운 모듈(중국어/대만어 frontend, torch, transformers 등)이 메모리에 올라왔는지 출력합니다.
+다른 측정 결과가 섞이지 않도록 새 프로세스에서 한 번만 실행합니다.
+
+두 번째는 `python -X importtime` 으로 모듈별 누적 import 시간을 재고, --check 이면
+IMPORT_BUDGET_MS 를 넘는 모듈이 있을 때 종료 코드 1 을 반환합니다. (CI 에서 사용)
+--record 이면 검사 대신 IMPORT_BASELINE_MS 에 넣을 기준선을 잽니다.
+"""
+import argparse
+import json5
+import os
+import re
+import resource
+import subprocess
+import sys
+import time
+from const import MODEL_PATH
+
+HEAVY_MODULES = ("nctp.chinese", "nctp.taiwanese", "tn", "torch", "transformers", "fasttext", "inflect",
+                 "MeCab", "g2p_en", "gruut", "pyopenjtalk", "pykakasi", "jieba", "pypinyin", "librosa",
+                 "scipy", "onnxruntime")
+
+# `python -X importtime -c "import <module>"` 누적 시간(ms) 기준선. `--importtime main --record` 로 잰 값(10회 중 최소를 3번 잰 것 중 최소)입니다.
+# main: 지연 import 전 432ms (scipy.io 106, onnxruntime 25 포함) -> 후 297ms (대부분 fastapi, 개발 PC).
+#       같은 코드를 리눅스 컨테이너에서 --record 로 여러 번 재면 387~429ms 라서, 그중 최소값을 기준선으로 둡니다.
+#       검사할 환경이 다르면 그 환경에서 --record 로 다시 재서 바꿉니다.
+# nctp: 한국어만 사용하는 구성 기준. 지연 import 전에는 fasttext/inflect/kanjize 와
+#       중국어·대만어 frontend(torch, transformers, WeTextProcessing)까지 import 되었습니다.
+#       nctp 의존 패키지가 설치된 환경에서 --record 로 잰 값을 추가하면 budget 검사 대상이 됩니다.
+IMPORT_BASELINE_MS = {"main": 387}
+# 허용 상한 = 기준선 * (1 + IMPORT_BUDGET_MARGIN). 같은 환경에서도 최소값이 ±15% 정도 흔들리므로 30% 여유를 둡니다.
+# 지연 import 가 풀려 무거운 모듈(scipy.io 등)이 다시 올라오면 이 여유를 넘습니다.
+IMPORT_BUDGET_MARGIN = 0.3
+IMPORT_BUDGET_MS = {module: round(baseline * (1 + IMPORT_BUDGET_MARGIN)) for module, baseline in IMPORT_BASELINE_MS.items()}
+
+
+def max_rss_mb() -> float:
+    # Linux 에서 ru_maxrss 단위는 KiB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def measure(nctp_params: dict) -> dict:
+    rss0 = max_rss_mb()
+    start = time.perf_counter()
+    from nctts_onnx import frontend
+    import_s = time.perf_counter() - start
+    rss1 = max_rss_mb()
+    start = time.perf_counter()
+    frontend.shared_text_processor(nctp_params)
+    build_s = time.perf_counter() - start
+    rss2 = max_rss_mb()
+    return {
+        "languages": sorted(nctp_params),
+        "import_s": round(import_s, 3),
+        "build_s": round(build_s, 3),
+        "import_rss_mb": round(rss1 - rss0, 1),
+        "build_rss_mb": round(rss2 - rss1, 1),
+        "max_rss_mb": round(rss2, 1),
+        "loaded": [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+
+
+def import_time(module: str, repeat: int = 5, top: int = 5):
+    """
+    새 프로세스에서 module 을 import 하고 (누적 ms, 가장 무거운 바로 아래 모듈 목록) 을 반환합니다.
+    측정 편차가 크므로 repeat 번 중 가장 빠른 결과를 사용합니다.
+    """
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+        cumulative = {}
+        for line in proc.stderr.splitlines():
+            match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( +)(\S+)", line)
+            if match:
+                # 들여쓰기 1칸 = import 한 모듈, 3칸 = 그 바로 아래
+                cumulative[(len(match.group(2)), match.group(3))] = int(match.group(1)) / 1000.0
+        total = cumulative.get((1, module), 0.0)
+        if best is None or total < best[0]:
+            children = sorted(((ms, name) for (depth, name), ms in cumulative.items() if depth == 3), reverse=True)[:top]
+            best = (total, children)
+    return best
+
+
+def check_import_budget(modules) -> bool:
+    """기준선이 없는 module 은 시간만 출력하고 검사하지 않습니다."""
+    ok = True
+    for module in modules:
+        total, children = import_time(module)
+        budget = IMPORT_BUDGET_MS.get(module)
+        over = budget is not None and total > budget
+        ok = ok and not over
+        limit = f"budget {budget}ms{', EXCEEDED' if over else ''}" if budget is not None else "no baseline"
+        print(f"{module:>14}: {total:.1f}ms ({limit}) "
+              + ", ".join(f"{name} {ms:.1f}ms" for ms, name in children))
+    return ok
+
+
+def record_baseline(modules, rounds: int = 3) -> dict:
+    """IMPORT_BASELINE_MS 에 넣을 값. 10회 중 최소를 rounds 번 재서 그중 최소를 씁니다."""
+    return {module: round(min(import_time(module, repeat=10)[0] for _ in range(rounds))) for module in modules}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Startup time and RSS of the nctp text frontend")
+    parser.add_argument("--model_path", default=MODEL_PATH)
+    parser.add_argument("--keys", default=None, help="comma separated nctp_params keys to build (default: all)")
+    parser.add_argument("--importtime", default=None, help="comma separated modules to time with -X importtime")
+    parser.add_argument("--check", action="store_true", help="exit 1 if an --importtime module exceeds IMPORT_BUDGET_MS")
+    parser.add_argument("--record", action="store_true", help="print IMPORT_BASELINE_MS values for the --importtime modules")
+    args = parser.parse_args()
+
+    if args.importtime and args.record:
+        print(record_baseline(args.importtime.split(",")))
+        sys.exit(0)
+    if args.importtime:
+        ok = check_import_budget(args.importtime.split(","))
+        sys.exit(0 if ok or not args.check else 1)
+
+    nctp_params = json5.load(open(os.path.join(args.model_path, "config.json5"))).get("nctp_params")
+    if args.keys:
+        nctp_params = {k: v for k, v in nctp_params.items() if k in args.keys.split(",")}
+    result = measure(nctp_params)
+    for k, v in result.items():
+        print(f"{k:>14}: {v}")
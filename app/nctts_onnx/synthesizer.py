@@ -1,49 +1,141 @@
 # app/resnet/handler.py
 
+import hashlib
+import json
 import numpy as np
 import os
 import onnxruntime as ort
 import json5
+import time
 import warnings
-from const import MODEL_PATH, MAX_TTS_TEXT_LEN
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from const import MODEL_PATH, MAX_TTS_TEXT_LEN, SYNTH_BATCH_MAX_SIZE, SYNTH_BATCH_WINDOW_MS, STREAM_MAX_CHARS
+from const import VOCODER_STREAM_WINDOW, VOCODER_STREAM_CONTEXT, VOCODER_STREAM_CROSSFADE
+from const import SYNTH_LENGTH_BUCKETS, BATCH_RUN_SIZE
+from const import SYNTH_EXECUTION_PROFILE, AM_SESSION_SETTINGS, VOC_SESSION_SETTINGS, AM_PRECISION, VOC_PRECISION
+from const import ORT_CACHE_DIR, SYNTH_INIT_WORKERS, WARMUP_CORPUS
+from const import STAGE_FRONTEND_CONCURRENCY, STAGE_AM_CONCURRENCY, STAGE_VOCODER_CONCURRENCY
 from logger import setup_logger  # setup_logger가 있는 모듈
-from nctp.text_processor import TextProcessor, MultiTextProcessor
+from nctts_onnx.batcher import MicroBatcher
+from nctts_onnx.binding import BoundSession
+from nctts_onnx.pool import SessionPool
+from nctts_onnx.pipeline import Stage
+from nctts_onnx.buckets import LengthBuckets, InputTooLongError
+from nctts_onnx import cancel
+from nctts_onnx.cancel import SynthCancelled
+from nctts_onnx.frontend_cache import frontend_cache
+from nctts_onnx import frontend
+from nctts_onnx import warmup
+from nctts_onnx.segment import split_sentences
+from nctts_onnx.session import execution_providers, create_session, describe, model_file, file_sha256
+from nctts_onnx.vocoder_stream import iter_vocoder_blocks
 
+import logging
 import sys
+import threading
 from contextlib import contextmanager
 
+# fd 2 는 프로세스 전역이므로 여러 워커 스레드가 동시에 텍스트 처리를 해도 안전하도록 참조 카운트로 관리합니다.
+# 처음 진입한 스레드만 리다이렉트하고, 마지막으로 나가는 스레드가 복구합니다.
+# 그동안 다른 스레드의 Python 출력(로그, uvicorn 로그, traceback)이 사라지지 않도록, 처음 숨기기 전에
+# sys.stderr 와 stderr 로 쓰는 logging handler 를 원래 stderr 의 복제본으로 옮깁니다. (_install_stream_guards)
+# 숨겨지는 것은 리다이렉트 동안 native 코드가 fd 2 에 직접 쓰는 출력과, suppress_output 안에 있는 스레드의 출력뿐입니다.
+_suppress_lock = threading.Lock()
+_c_stderr_depth = 0
+_c_stderr_saved = None
+_guards_installed = False
+_muted = threading.local()
+
+
+class _ThreadMutedStream:
+    """suppress_output 안에 있는 스레드의 출력만 버리고, 나머지 스레드의 출력은 원래 스트림으로 보냅니다."""
+    def __init__(self, stream):
+        self._stream = stream
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    def write(self, data):
+        if getattr(_muted, "depth", 0):
+            return len(data)
+        return self._stream.write(data)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+
+def _install_stream_guards():
+    global _guards_installed
+    with _suppress_lock:
+        if _guards_installed:
+            return
+        stderr = sys.stderr
+        if stderr is sys.__stderr__:
+            stderr = os.fdopen(os.dup(sys.__stderr__.fileno()), "w", buffering=1,
+                               encoding=sys.__stderr__.encoding, errors="backslashreplace")
+            # uvicorn 등 이미 만들어진 stderr handler 도 복제본으로 옮깁니다. (setup_logger 의 handler 는 이미 복제본 사용)
+            loggers = [logging.getLogger()] + [logger for logger in list(logging.Logger.manager.loggerDict.values())
+                                               if isinstance(logger, logging.Logger)]
+            for logger in loggers:
+                for handler in logger.handlers:
+                    if isinstance(handler, logging.StreamHandler) and handler.stream is sys.__stderr__:
+                        handler.setStream(stderr)
+        sys.stdout, sys.stderr = _ThreadMutedStream(sys.stdout), _ThreadMutedStream(stderr)
+        _guards_installed = True
+
+
 @contextmanager
 def suppress_c_stderr():
-    devnull = os.open(os.devnull, os.O_WRONLY)
-    old_stderr = os.dup(sys.stderr.fileno())
-    os.dup2(devnull, sys.stderr.fileno())
+    """native 코드가 fd 2 에 쓰는 출력 숨기기"""
+    global _c_stderr_depth, _c_stderr_saved
+    _install_stream_guards()
+    stderr_fd = sys.__stderr__.fileno()
+    with _suppress_lock:
+        if _c_stderr_depth == 0:
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            _c_stderr_saved = os.dup(stderr_fd)
+            os.dup2(devnull, stderr_fd)
+            os.close(devnull)
+        _c_stderr_depth += 1
     try:
         yield
     finally:
-        os.dup2(old_stderr, sys.stderr.fileno())
-        os.close(devnull)
+        with _suppress_lock:
+            _c_stderr_depth -= 1
+            if _c_stderr_depth == 0:
+                os.dup2(_c_stderr_saved, stderr_fd)
+                os.close(_c_stderr_saved)
+                _c_stderr_saved = None
+
+
 @contextmanager
 def suppress_output():
-    """stdout + stderr 숨기기"""
-    devnull = open(os.devnull, "w")
-    old_stdout, old_stderr = sys.stdout, sys.stderr
-    sys.stdout, sys.stderr = devnull, devnull
+    """현재 스레드의 stdout + stderr 숨기기"""
+    _install_stream_guards()
+    _muted.depth = getattr(_muted, "depth", 0) + 1
     try:
         yield
     finally:
-        sys.stdout, sys.stderr = old_stdout, old_stderr
-        devnull.close()
-        
+        _muted.depth -= 1
+
 # 로거 생성
 Logger = setup_logger()
 
 ort.set_default_logger_severity(3) # ERROR 이상만
 
 class Syntheseizer:
-    def __init__(self, model_path: str = MODEL_PATH):
+    sample_rate = 44100
+    hop_length = 1024   # vocoder 의 mel frame 당 sample 수
+
+    def __init__(self, model_path: str = MODEL_PATH, name: str = "default"):
+        self.name = name    # 여러 모델을 함께 띄울 때 요청에서 고르는 이름
         self.model_path = model_path
+        # 단계별 초기화 시간(초). 동시에 실행한 단계 중 가장 긴 것이 cold start 의 critical path 입니다.
+        self.init_timings = {}
+        init_start = time.perf_counter()
         try:
-            self.config = json5.load(open(os.path.join(model_path,"config.json5")))
+            self.config = self._timed("config", lambda: json5.load(open(os.path.join(model_path,"config.json5"))))
             self.version = self.config.get("version")
             self.languages = self.config.get("languages")
             self.lang_code_list = list(self.languages.keys())
@@ -52,72 +144,167 @@ class Syntheseizer:
         except Exception as e:
             Logger.error(f"failed to initialize config.")
             raise Exception(f"failed to initialize config.")
-        self._load_model()
-        ##########################################
-        ## nctp 
-        ##########################################
-        NCTTS_TM = os.getenv("NCTTS_TM")
-        # Logger.info(f"NCTP NCTTS_TM PATH: {NCTTS_TM}")
+        # 실행 프로파일, GPU, 모델 파일 정밀도를 먼저 확인해 쓸 수 없으면 세션/nctp 생성을 시작하지 않습니다.
+        self.providers, self.model_files = self._resolve_load_targets()
+        # am/vocoder 세션 생성과 nctp TextProcessor 생성은 서로 독립이므로 스레드 풀에서 동시에 실행합니다.
+        # (SYNTH_INIT_WORKERS=1 이면 예전처럼 am → vocoder → nctp 순서)
+        load_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, SYNTH_INIT_WORKERS), thread_name_prefix="synth-init") as pool:
+            sessions = self._submit_sessions(pool)
+            ##########################################
+            ## nctp 
+            ##########################################
+            NCTTS_TM = os.getenv("NCTTS_TM")
+            # Logger.info(f"NCTP NCTTS_TM PATH: {NCTTS_TM}")
+            # nctp_params 가 같은 다른 모델(또는 교체 전 인스턴스)과 frontend 를 공유
+            text_processor = pool.submit(self._timed, "nctp", frontend.shared_text_processor,
+                                         self.config.get("nctp_params"), SYNTH_INIT_WORKERS)
+            # 실패 처리는 순서대로 실행할 때와 같습니다. (세션 실패가 먼저, 나머지 작업이 끝난 뒤 예외)
+            self._load_model(sessions)
+            try:
+                self.m_proc, self.nctp_digest = text_processor.result()
+            except Exception as e:
+                Logger.error(f"failed to initialize text processing.")
+                raise Exception(f"failed to initialize text processing.")
+        self.init_timings["load"] = round(time.perf_counter() - load_start, 3)
+        # 모델 파일이 바뀌면 version 이 같아도 결과 캐시 key 가 달라지도록 내용 hash 를 붙입니다.
+        self.revision = self._revision()
+        # am.onnx 입력은 길이가 들어가는 가장 작은 bucket 까지만 padding
+        self.buckets = LengthBuckets(SYNTH_LENGTH_BUCKETS)
+        # frontend → am → vocoder 단계별 동시 실행 제한 (워커 스레드들이 단계를 겹쳐 실행)
+        self.stages = {"frontend": Stage("frontend", STAGE_FRONTEND_CONCURRENCY),
+                       "am": Stage("am", STAGE_AM_CONCURRENCY),
+                       "vocoder": Stage("vocoder", STAGE_VOCODER_CONCURRENCY)}
+        # vocoder 에 넣기 전에 잘라 낸 mel frame 통계
+        self._frames_lock = threading.Lock()
+        self._frames = {"requests": 0, "am_frames": 0, "vocoded_frames": 0, "saved_ratio_total": 0.0}
+        # 동시에 들어온 요청을 모아 am/vocoder 를 한 번에 실행 (SYNTH_BATCH_MAX_SIZE <= 1 이면 사용하지 않음)
+        self.batcher = None
+        if SYNTH_BATCH_MAX_SIZE > 1:
+            self.batcher = MicroBatcher(self._run_models, SYNTH_BATCH_MAX_SIZE, SYNTH_BATCH_WINDOW_MS)
+            Logger.info(f"micro-batching enabled. (max_batch_size={SYNTH_BATCH_MAX_SIZE}, window={SYNTH_BATCH_WINDOW_MS}ms)")
+        self._timed("warmup", self._warmup)
+        self.init_timings["total"] = round(time.perf_counter() - init_start, 3)
+        self._log_init_timings()
+
+    def _revision(self) -> str:
+        """version 과 config.json5, am/vocoder 모델 파일 내용으로 만든 모델 식별자"""
+        files = [os.path.join(self.model_path, "config.json5"), self.model_files["am"], self.model_files["vocoder"]]
+        digest = hashlib.sha256(json.dumps([file_sha256(path) for path in files]).encode("utf-8")).hexdigest()
+        return f"{self.version}-{digest[:12]}"
+
+    def _timed(self, phase, fn, *args):
+        start = time.perf_counter()
         try:
-            procs = {}
-            for k, v in self.config.get("nctp_params").items():
-                procs[k] = TextProcessor(language=v['language'], normalize_step=v['normalize_step'] if type(v['normalize_step']) is str or type(v['normalize_step']) is list else list(v['normalize_step']), use_g2p=v['use_g2p'])
-            self.m_proc = MultiTextProcessor(procs)    
-        except Exception as e:
-            Logger.error(f"failed to initialize text processing.")
-            raise Exception(f"failed to initialize text processing.")
-        self._warmup()
-        
-    def _load_model(self):
+            return fn(*args)
+        finally:
+            self.init_timings[phase] = round(time.perf_counter() - start, 3)
+
+    def _log_init_timings(self):
+        timings = self.init_timings
+        parallel = {k: v for k, v in timings.items() if k.startswith(("am[", "vocoder[")) or k == "nctp"}
+        critical = max(parallel, key=parallel.get) if parallel else None
+        Logger.info(f"model '{self.name}' initialized in {timings['total']:.2f}s. ("
+                    + ", ".join(f"{k} {v:.2f}s" for k, v in timings.items() if k != "total")
+                    + f", critical path: {critical}, init workers: {SYNTH_INIT_WORKERS})")
+
+    def _resolve_load_targets(self):
+        """(ORT provider 목록, {"am": 경로, "vocoder": 경로}) 를 반환합니다. 설정이 잘못되었거나 GPU 가 없으면 로드 실패."""
+        profile = SYNTH_EXECUTION_PROFILE
+        Logger.info(f"model load started. (execution profile: {profile})")
+        try:
+            providers = execution_providers(profile)
+            files = {"am": model_file(self.model_path, "am", AM_PRECISION),
+                     "vocoder": model_file(self.model_path, "vocoder", VOC_PRECISION)}
+        except ValueError as e:
+            Logger.error(f"model load failed. ({e})")
+            raise Exception("model load failed.")
+        if profile == "gpu" and "CUDAExecutionProvider" not in ort.get_available_providers():
+            Logger.error(f"Failed to load with GPU")
+            Logger.error(f"model load failed.")
+            raise Exception("model load failed.")
+        return providers, files
+
+    def _submit_sessions(self, pool):
+        """am/vocoder 세션(복제본 포함) 생성을 pool 에 넣고 future 목록을 반환합니다."""
+        # ORT_CACHE_DIR 가 있으면 최적화된 그래프를 재사용해 시작 시간을 줄입니다.
+        futures = {"am": [], "vocoder": []}
+        for name, settings in (("am", AM_SESSION_SETTINGS), ("vocoder", VOC_SESSION_SETTINGS)):
+            for i in range(settings["replicas"]):
+                futures[name].append(pool.submit(self._timed, f"{name}[{i}]", create_session,
+                                                 self.model_files[name], settings, self.providers, ORT_CACHE_DIR))
+        return futures
+
+    def _load_model(self, sessions):
         ##########################################
         ## TTS 모델 로드
         ##########################################
         CUDA_VISIBLE_DEVICES = os.getenv("CUDA_VISIBLE_DEVICES")
         # Logger.info(f"CUDA_VISIBLE_DEVICES:  {CUDA_VISIBLE_DEVICES}")
-        Logger.info(f"model load started.")
+        profile = SYNTH_EXECUTION_PROFILE
         try:
-            if "CUDAExecutionProvider" not in ort.get_available_providers():
-                Logger.error(f"Failed to load with GPU")
-                raise Exception("Failed to load with GPU")
-            so = ort.SessionOptions()
-            so.log_severity_level = 3 # 로그 ERROR 이상만 출력
-            so.log_verbosity_level = 0
-            so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL #세 션을 전역(global) 객체로 두고, 요청마다 새 세션을 만들지 않도록
-            self.sess_am = ort.InferenceSession(
-                os.path.join(self.model_path,"am.onnx"), sess_options=so,
-                providers=[
-                    ("CUDAExecutionProvider", {"device_id": 0}),  # 0번 GPU
-                    "CPUExecutionProvider"                        # 실패시 CPU fallback
-                ],
-            )
+            # 세션을 전역(global) 객체로 두고, 요청마다 새 세션을 만들지 않도록
+            # 모델마다 *_SESSION_REPLICAS 개의 세션을 만들어 동시에 들어온 요청이 나눠 씁니다.
+            # 입출력 이름/dtype 은 여기서 한 번만 조회하고, 입력 버퍼는 요청 사이에 재사용합니다.
+            self.am = SessionPool([BoundSession(f.result()) for f in sessions["am"]])    # outputs: mels, durations (ganspeech)
             # vocoder
-            self.sess_voc = ort.InferenceSession(
-                os.path.join(self.model_path,"vocoder.onnx"), sess_options=so,
-                providers=[
-                    ("CUDAExecutionProvider", {"device_id": 0}),  # 0번 GPU
-                    "CPUExecutionProvider"                        # 실패시 CPU fallback
-                ],
-            )
-            if "CUDAExecutionProvider" not in self.sess_am.get_provider_options():
+            self.voc = SessionPool([BoundSession(f.result()) for f in sessions["vocoder"]])
+            self.sess_am, self.sess_voc = self.am.sess, self.voc.sess
+            if profile == "gpu" and "CUDAExecutionProvider" not in self.sess_am.get_provider_options():
                 Logger.error(f"Failed to load with GPU")
                 raise Exception("Failed to load with GPU")
+            Logger.info(f"execution profile: {profile}, providers={self.sess_am.get_providers()}")
+            Logger.info(f"am.onnx session: precision={AM_PRECISION}, {describe(AM_SESSION_SETTINGS)}")
+            Logger.info(f"vocoder.onnx session: precision={VOC_PRECISION}, {describe(VOC_SESSION_SETTINGS)}")
         except Exception as e:
             Logger.error(f"model load failed.")
             raise Exception("model load failed.")
         Logger.info(f"model load finished.")
         
     def _warmup(self):
+        """
+        config 의 모든 언어 코드, 여러 입력 길이, 모든 emotion 으로 합성해 첫 요청의 지연을 없앱니다.
+        문장 자체가 잘못된 경우(지원하지 않는 길이 등)는 건너뛰고, 그 밖의 실패는 로드 실패로 처리합니다.
+        """
         Logger.info("model warm-up started.")
+        self.warmup_timings = []
         try:
-            first_voice_id = next(iter(self.voices))
-            _, _ = self.infer(first_voice_id,"ko_KR","[l]하하하[/l] 그림자왕? 리세온? 무슨 말이야? 난... 그냥... 난 누구인지도 몰라. 이 망토도, 이 단검도... 모두 낯설기만 해.")
+            items, missing = warmup.plan(warmup.load_corpus(self.model_path, WARMUP_CORPUS), self.languages, self.voices)
+            for lang_code in missing:
+                Logger.warning(f"model warm-up: no sentence for {lang_code}, skipped.")
+            done = []
+            for voice_id, lang_code, text, emotion in items:
+                start = time.perf_counter()
+                try:
+                    _, _ = self.infer(voice_id, lang_code, text, emotion)
+                except (ValueError, InputTooLongError) as e:
+                    Logger.warning(f"model warm-up: {lang_code}/{emotion} skipped. ({e})")
+                    continue
+                elapsed_ms = round((time.perf_counter() - start) * 1000.0, 1)
+                done.append((voice_id, lang_code, text, emotion))
+                self.warmup_timings.append({"language": lang_code, "emotion": emotion, "chars": len(text), "ms": elapsed_ms})
+                Logger.info(f"model warm-up: {lang_code}/{emotion} {len(text)} chars in {elapsed_ms}ms.")
+            if not done:
+                raise Exception("no warm-up sentence could be synthesized.")
+            # bucket 마다 am.onnx 입력 shape 가 다르므로 각 bucket 길이로 한 번씩 실행
+            # 위 문장들은 풀이 돌려준 replica 하나에서만 실행되므로, 모든 replica 에서 bucket 마다 실행합니다.
+            voice_id, lang_code, text, emotion = done[0]
+            feats = self._frontend(self.voices[voice_id]["emotion"][emotion], lang_code, text)
+            replicas = max(len(self.am.replicas), len(self.voc.replicas))
+            for i in range(replicas):
+                with self.am.pinned(self.am.replicas[i % len(self.am.replicas)]), \
+                        self.voc.pinned(self.voc.replicas[i % len(self.voc.replicas)]):
+                    for bucket in self.buckets.lengths:
+                        start = time.perf_counter()
+                        filled = dict(feats, **{k: np.resize(feats[k], bucket) for k in ('texts', 'puncs', 'tone', 'styletag')})
+                        self._run_models([filled])
+                        Logger.info(f"model warm-up: replica {i} bucket {bucket} done in {(time.perf_counter() - start) * 1000.0:.1f}ms.")
         except Exception as e:
             Logger.error(f"warm-up failed.")
             raise Exception("warm-up failed.")
-        Logger.info("model warm-up finished.")
-    
+        Logger.info(f"model warm-up finished. ({len(done)}/{len(items)} sentences)")
 
-    def infer(self, voice_id, lang_code, text, emotion="neutral"):
+    def _validate(self, voice_id, lang_code, text, emotion):
         if voice_id not in self.voice_id_list:
             raise ValueError(f"voice_id '{voice_id}' does not exist.")
         if not self.voices[voice_id]["emotion"].get(emotion, False):
@@ -127,62 +314,279 @@ class Syntheseizer:
                             f"Supported languages are: {', '.join(self.lang_code_list)}")
         if len(text) > MAX_TTS_TEXT_LEN:
             raise ValueError(f"Input text too long ({len(text)} > {MAX_TTS_TEXT_LEN} characters).")
+
+    def infer(self, voice_id, lang_code, text, emotion="neutral"):
+        self._validate(voice_id, lang_code, text, emotion)
+        # 대기열에서 기다리는 동안 취소/만료된 요청은 실행하지 않습니다.
+        cancel.check()
         try:
             voice_id = self.voices[voice_id]["emotion"][emotion]
             wav, sr = self._synth(voice_id, lang_code, text)
             return wav, sr
+        except (InputTooLongError, SynthCancelled):
+            raise
         except Exception as e:
             raise Exception(f"Internal error occurred.")
-        
+
+    def infer_batch(self, items):
+        """
+        여러 요청 [(voice_id, lang_code, text, emotion), ...] 을 한 번에 합성합니다.
+        frontend 결과를 length bucket 별로 묶고 길이 순으로 정렬해 BATCH_RUN_SIZE 행씩 am/vocoder 를 실행합니다.
+        결과는 items 와 같은 순서의 리스트이며, 각 항목은 (wav, sr) 또는 실패 원인 예외입니다.
+        (ValueError: 잘못된 요청, 그 외: 내부 오류) 한 항목의 실패가 나머지 항목에 영향을 주지 않습니다.
+        요청이 취소되면 남은 항목을 실행하지 않고 SynthCancelled 를 냅니다.
+        """
+        results = [None] * len(items)
+        groups = {}
+        for i, (voice_id, lang_code, text, emotion) in enumerate(items):
+            try:
+                self._validate(voice_id, lang_code, text, emotion)
+                voice = self.voices[voice_id]["emotion"][emotion]
+                try:
+                    feats = self._frontend(voice, lang_code, text)
+                except InputTooLongError as e:
+                    # 가장 큰 bucket 보다 긴 항목은 단건과 같이 나눠서 합성
+                    results[i] = (self._synth_split(voice, lang_code, text, e), self.sample_rate)
+                    continue
+                groups.setdefault(self.buckets.select(len(feats['texts'])), []).append((i, feats))
+            except SynthCancelled:
+                raise
+            except ValueError as e:
+                results[i] = e
+            except Exception as e:
+                results[i] = Exception(f"Internal error occurred.")
+        for bucket, rows in groups.items():
+            rows.sort(key=lambda row: len(row[1]['texts']))
+            for start in range(0, len(rows), BATCH_RUN_SIZE):
+                chunk = rows[start:start + BATCH_RUN_SIZE]
+                try:
+                    wavs = self._run_models([feats for _, feats in chunk])
+                except SynthCancelled:
+                    raise
+                except Exception:
+                    # 배치가 실패하면 한 행씩 다시 실행해 문제가 된 항목만 실패 처리
+                    wavs = []
+                    for _, feats in chunk:
+                        try:
+                            wavs.append(self._run_models([feats])[0])
+                        except SynthCancelled:
+                            raise
+                        except Exception:
+                            wavs.append(Exception(f"Internal error occurred."))
+                for (i, _), wav in zip(chunk, wavs):
+                    results[i] = wav if isinstance(wav, Exception) else (wav, self.sample_rate)
+        return results
+
+    def split_for_stream(self, voice_id, lang_code, text, emotion="neutral"):
+        """
+        요청을 검증한 뒤 스트리밍 합성 단위(문장)로 나눕니다.
+        각 조각은 순서대로 infer() 에 넘겨 합성합니다.
+        """
+        self._validate(voice_id, lang_code, text, emotion)
+        return split_sentences(text, max_chars=STREAM_MAX_CHARS)
+
     def _synth(self, voice_id, lang_code, text):
-        voice_index = self.voices[voice_id]['voice_index']
+        try:
+            feats = self._frontend(voice_id, lang_code, text)
+        except InputTooLongError as e:
+            return self._synth_split(voice_id, lang_code, text, e), self.sample_rate
+        if self.batcher is not None:
+            # 같은 bucket 의 요청끼리만 배치로 묶습니다.
+            # 다른 요청과 함께 실행되는 배치는 중단하지 않고, 아직 시작 전이면 배치에서 뺍니다.
+            token = cancel.current()
+            cancel.check()
+            future = self.batcher.submit(feats, key=self.buckets.select(len(feats['texts'])))
+            drop = lambda reason: future.cancel()
+            if token is not None:
+                token.add_callback(drop)
+            try:
+                wav = future.result()
+            except CancelledError:
+                raise SynthCancelled(token.reason)
+            finally:
+                if token is not None:
+                    token.remove_callback(drop)
+        else:
+            wav = self._run_models([feats])[0]
+        return wav, self.sample_rate
+
+    def _synth_split(self, voice_id, lang_code, text, error):
+        """가장 큰 bucket 보다 긴 입력은 문장 단위, 그래도 길면 쉼표 단위로 나눠 합성한 뒤 이어 붙입니다."""
+        return np.concatenate([self._synth(voice_id, lang_code, piece)[0] for piece in self._split_long(text, error)])
+
+    def _split_long(self, text, error):
+        """
+        _frontend 에서 InputTooLongError 가 난 입력을 문장 단위, 그래도 한 조각이면 쉼표 단위로 나눕니다.
+        더 나눌 수 없으면 frontend 의 symbol 길이가 담긴 error 를 그대로 냅니다.
+        """
+        for max_chars in (0, 1):
+            pieces = split_sentences(text, max_chars=max_chars)
+            if len(pieces) > 1:
+                return pieces
+        raise error
+
+    def _frontend(self, voice_id, lang_code, text):
+        """텍스트를 am.onnx 입력 한 행(padding 전)으로 변환합니다."""
         language = self.languages[lang_code]["language"]
-        lang_idx = self.languages[lang_code]["index"]
+        key = frontend_cache.make_key(self.nctp_digest, language, text)
+        arrays = frontend_cache.get(key)
+        if arrays is None:
+            with self.stages["frontend"].run():
+                arrays = self._process_text(language, text)
+            frontend_cache.put(key, arrays)
+        if len(arrays['texts']) > self.buckets.max_length:
+            raise InputTooLongError(len(arrays['texts']), self.buckets.max_length)
+        return dict(arrays,
+                    speaker_id=self.voices[voice_id]['voice_index'],
+                    lang_num=self.languages[lang_code]["index"])
+
+    def _process_text(self, language, text):
+        """nctp 로 텍스트를 symbol 로 바꾸고 punctuation/tone/style tag 배열로 나눕니다. (voice 와 무관)"""
+        cancel.check()
+        # 텍스트 처리 모듈(MeCab, jieba 등)의 C 레벨 출력만 숨깁니다. ORT 로그는 severity 로 제어합니다.
         with suppress_c_stderr():
             with suppress_output():
                 text, style_dict = self.m_proc.processors[language].parse(text)
                 symbol = self.m_proc.input2symbol(text, options=[], language=language)
-                        
-            if language == "taiwanese":
-                symbol = np.array(symbol)
-                plb = np.where((173 <= symbol) & (symbol <= 176))
-                symbol = np.delete(symbol, plb)
-                p = np.where( (symbol > 1) & (symbol < 10) )
-                symbol = np.insert(symbol, p[0] + 1, 10)
-                if symbol[-2] == 10:
-                    symbol = np.delete(symbol, -2)
-            symbol, punc, p_pid = self.m_proc.processors[language].split_punc(symbol, get_pure=True)
-            symbol, tone, punc, _, t_pid = self.m_proc.processors[language].split_tone(symbol, punc=punc, get_pure=True)
-            symbol, styletag, punc, tone, s_pid = self.m_proc.processors[language].split_style_tag(symbol, punc=punc, tone=tone, get_pure=True)
-            text_lengths = np.array([len(symbol)])
-
-
-            texts = np.pad(symbol, (0,750-symbol.shape[0]))
-            punc = np.pad(punc, (0,750-symbol.shape[0]))
-            tone = np.pad(tone, (0,750-symbol.shape[0]))
-            styletag = np.pad(styletag, (0,750-symbol.shape[0]))
-
-            texts = np.expand_dims(texts, 0)
-            punc = np.expand_dims(punc, 0)
-            tone = np.expand_dims(tone, 0)
-            styletag = np.expand_dims(styletag, 0)
-            speaker_ids = np.array([voice_index])
-            lang_num = np.array([lang_idx])
-            input_ = {'texts':texts,
-            'puncs':punc,
-            'tone':tone,
-            'styletag':styletag,
-            'text_lengths':text_lengths,
-            'speaker_ids':speaker_ids,
-            'lang_num':lang_num}
-            # print(input_)
-            output_names = [self.sess_am.get_outputs()[0].name, self.sess_am.get_outputs()[1].name]  # ganspeech
-            mels, durations = self.sess_am.run(output_names, input_)
+
+        if language == "taiwanese":
+            symbol = np.array(symbol)
+            plb = np.where((173 <= symbol) & (symbol <= 176))
+            symbol = np.delete(symbol, plb)
+            p = np.where( (symbol > 1) & (symbol < 10) )
+            symbol = np.insert(symbol, p[0] + 1, 10)
+            if symbol[-2] == 10:
+                symbol = np.delete(symbol, -2)
+        symbol, punc, p_pid = self.m_proc.processors[language].split_punc(symbol, get_pure=True)
+        symbol, tone, punc, _, t_pid = self.m_proc.processors[language].split_tone(symbol, punc=punc, get_pure=True)
+        symbol, styletag, punc, tone, s_pid = self.m_proc.processors[language].split_style_tag(symbol, punc=punc, tone=tone, get_pure=True)
+        return {'texts': symbol,
+                'puncs': punc,
+                'tone': tone,
+                'styletag': styletag}
+
+    def _run_models(self, batch):
+        """
+        frontend 결과 목록을 한 배치로 쌓아 sess_am / sess_voc 를 한 번씩 실행하고,
+        각 행의 durations 합으로 waveform 을 잘라 batch 와 같은 순서로 반환합니다.
+        """
+        mels, frames = self._run_am(batch)
+        wavs = self._run_vocoder(self._crop_mels(mels, frames))
+        return [wav[:n_frames*self.hop_length] for wav, n_frames in zip(wavs, frames)]
+
+    def _crop_mels(self, mels, frames):
+        """
+        am 출력 mel 을 배치에서 가장 긴 행의 예측 frame 수까지만 남겨(view) vocoder 가 버릴 frame 을 계산하지 않도록 합니다.
+        frames 는 padding token 을 제외한 durations 합입니다.
+        """
+        total = mels.shape[-1]
+        keep = min(total, max(frames))
+        with self._frames_lock:
+            stat = self._frames
+            stat["requests"] += len(frames)
+            stat["am_frames"] += total * len(frames)
+            stat["vocoded_frames"] += keep * len(frames)
+            stat["saved_ratio_total"] += (1.0 - keep / total) * len(frames) if total else 0.0
+        return mels[:, :, :keep]
+
+    def _run_am(self, batch):
+        """
+        sess_am 을 실행해 vocoder 입력 mel (B, n_mels, T) 과 각 행의 유효 frame 수를 반환합니다.
+        mel 은 am 출력 (B, T, n_mels) 의 transpose view 이며, 연속 배열로의 복사는 _run_vocoder 에서 한 번만 합니다.
+        """
+        with self.stages["am"].run():
+            start = time.perf_counter()
+            rows = len(batch)
+            text_lengths = self.am.buffer('text_lengths', (rows,))
+            for i, feats in enumerate(batch):
+                text_lengths[i] = len(feats['texts'])
+            bucket = self.buckets.select(int(text_lengths.max()))
+            input_ = {'text_lengths': text_lengths}
+            for k in ('texts', 'puncs', 'tone', 'styletag'):
+                buf = input_[k] = self.am.buffer(k, (rows, bucket))
+                for i, feats in enumerate(batch):
+                    n = len(feats[k])
+                    buf[i, :n] = feats[k]
+                    buf[i, n:] = 0
+            input_['speaker_ids'] = self.am.buffer('speaker_ids', (rows,))
+            input_['lang_num'] = self.am.buffer('lang_num', (rows,))
+            for i, feats in enumerate(batch):
+                input_['speaker_ids'][i] = feats['speaker_id']
+                input_['lang_num'][i] = feats['lang_num']
+            # 취소/deadline 이 지나면 terminate 로 실행 중인 run 을 중단합니다.
+            with cancel.run_options() as run_options:
+                mels, durations = self.am.run(input_, run_options)
             mels = np.transpose(mels, (0,2,1))
-            input_ = {'fmels':mels}
-            output_names = [self.sess_voc.get_outputs()[0].name]
-            wavs = self.sess_voc.run(output_names, input_)
-            total_length = int(np.round(durations).sum())
-            wavs = wavs[0][:total_length*1024]
-        
-        return wavs, 44100 #sr
\ No newline at end of file
+            frames = [int(np.round(durations[i][:text_length]).sum()) for i, text_length in enumerate(text_lengths)]
+            self.buckets.record(bucket, rows, time.perf_counter() - start)
+            return mels, frames
+
+    def _run_vocoder(self, mels):
+        """sess_voc 을 실행해 (B, samples) waveform 을 반환합니다. mels 는 view 여도 됩니다."""
+        with self.stages["vocoder"].run():
+            fmels = self.voc.buffer('fmels', mels.shape)
+            np.copyto(fmels, mels)
+            with cancel.run_options() as run_options:
+                wavs = self.voc.run({'fmels': fmels}, run_options)[0]
+            return wavs.reshape(mels.shape[0], -1)
+
+    def infer_blocks(self, voice_id, lang_code, text, emotion="neutral"):
+        """
+        am.onnx 는 한 번에 실행하고, vocoder.onnx 는 VOCODER_STREAM_WINDOW frame 단위로 실행하면서
+        완성된 오디오 블록을 순서대로 yield 합니다. 블록을 모두 이으면 infer() 결과와 같은 길이입니다.
+        """
+        self._validate(voice_id, lang_code, text, emotion)
+        try:
+            voice_id = self.voices[voice_id]["emotion"][emotion]
+            yield from self._synth_blocks(voice_id, lang_code, text)
+        except (InputTooLongError, SynthCancelled):
+            raise
+        except Exception as e:
+            raise Exception(f"Internal error occurred.")
+
+    def _synth_blocks(self, voice_id, lang_code, text):
+        """
+        infer_blocks 의 실제 합성. 가장 큰 bucket 보다 긴 입력은 _synth 와 같이 나눈 뒤,
+        조각마다 블록을 순서대로 yield 합니다.
+        """
+        try:
+            feats = self._frontend(voice_id, lang_code, text)
+        except InputTooLongError as e:
+            for piece in self._split_long(text, e):
+                yield from self._synth_blocks(voice_id, lang_code, piece)
+            return
+        mels, frames = self._run_am([feats])
+        yield from iter_vocoder_blocks(lambda m: self._run_vocoder(m)[0], self._crop_mels(mels, frames),
+                                       window=VOCODER_STREAM_WINDOW, context=VOCODER_STREAM_CONTEXT,
+                                       crossfade=VOCODER_STREAM_CROSSFADE, hop_length=self.hop_length)
+
+    def close(self):
+        """hot reload 로 교체된 뒤 진행 중인 요청이 모두 끝나면 호출합니다. 세션과 배칭 스레드를 해제합니다."""
+        if self.batcher is not None:
+            self.batcher.close()
+        self.am = self.voc = self.sess_am = self.sess_voc = None
+        # 공유 frontend 는 마지막으로 사용하던 모델이 놓을 때 해제됩니다.
+        self.m_proc = None
+
+    def _frame_stats(self) -> dict:
+        with self._frames_lock:
+            stat = self._frames
+            return {
+                "requests": stat["requests"],
+                "am_frames": stat["am_frames"],
+                "vocoded_frames": stat["vocoded_frames"],
+                "saved_ratio": round(1.0 - stat["vocoded_frames"] / stat["am_frames"], 4) if stat["am_frames"] else 0.0,
+                "mean_saved_ratio_per_request": round(stat["saved_ratio_total"] / stat["requests"], 4) if stat["requests"] else 0.0,
+            }
+
+    def stats(self) -> dict:
+        return {"batcher": self.batcher.stats() if self.batcher is not None else None,
+                "sessions": {"am": self.am.stats(), "vocoder": self.voc.stats()},
+                "stages": {name: stage.stats() for name, stage in self.stages.items()},
+                "cancellation": cancel.stats(),
+                "buckets": self.buckets.stats(),
+                "vocoder_frames": self._frame_stats(),
+                "frontend_cache": frontend_cache.stats(),
+                "frontend": {"nctp_params": self.nctp_digest[:8], **frontend.stats()},
+                "init_timings": dict(self.init_timings),
+                "warmup": list(self.warmup_timings)}
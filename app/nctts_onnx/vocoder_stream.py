@@ -0,0 +1,94 @@
+# app/nctts_onnx/vocoder_stream.py
+from typing import Callable, Iterator
+import numpy as np
+
+
+def iter_vocoder_blocks(vocode: Callable[[np.ndarray], np.ndarray], mels: np.ndarray,
+                        window: int, context: int = 8, crossfade: int = 0,
+                        hop_length: int = 1024) -> Iterator[np.ndarray]:
+    """
+    mel 을 window frame 단위로 나눠 vocoder 를 실행하고, 완성된 오디오 블록을 순서대로 yield 합니다.
+
+    각 window 는 양쪽에 context frame 을 덧붙여 vocoder 에 넣고, 결과에서 window 에 해당하는 구간만
+    hop_length 경계로 잘라 냅니다. crossfade 가 0 보다 크면 다음 window 의 앞부분을 이전 window 의
+    오른쪽 문맥으로 만든 오디오와 crossfade samples 만큼 섞어 경계를 부드럽게 합니다.
+
+    Args:
+        vocode: (1, n_mels, frames) mel (연속 배열이 아닌 view 일 수 있음) 을 받아 (frames * hop_length,) waveform 을 반환하는 함수
+        mels: (1, n_mels, T) vocoder 입력. T 는 유효 frame 수로 잘라서 넘깁니다.
+        window: 블록 당 frame 수. 0 이하이거나 T 이상이면 한 번에 실행합니다.
+        context: window 양쪽에 덧붙이는 문맥 frame 수
+        crossfade: 블록 경계 crossfade sample 수 (context * hop_length 를 넘지 않음)
+        hop_length: mel frame 당 sample 수
+
+    Returns:
+        블록을 모두 이으면 길이 T * hop_length 인 waveform
+    """
+    n_frames = mels.shape[-1]
+    if window <= 0 or window >= n_frames:
+        yield vocode(mels)[:n_frames * hop_length]
+        return
+    crossfade = max(0, min(crossfade, context * hop_length))
+    tail = None
+    for start in range(0, n_frames, window):
+        end = min(start + window, n_frames)
+        lo, hi = max(0, start - context), min(n_frames, end + context)
+        wav = vocode(mels[:, :, lo:hi])
+        head = (start - lo) * hop_length
+        core = (end - start) * hop_length
+        extra = min(crossfade, (hi - end) * hop_length)
+        block = np.array(wav[head:head + core + extra], copy=True)
+        if tail is not None:
+            n = min(len(tail), core)
+            fade = np.linspace(0.0, 1.0, n, dtype=block.dtype)
+            block[:n] = tail[:n] * (1.0 - fade) + block[:n] * fade
+        tail = block[core:] if extra > 0 else None
+        yield block[:core]
+
+
+if __name__ == "__main__":
+    # 품질/지연 측정: python -m nctts_onnx.vocoder_stream --windows 8,16,32,64
+    # 한 번에 vocoder 를 실행한 결과와 window 단위 결과의 최대 sample 오차, 첫 블록까지의 시간을 비교합니다.
+    import argparse
+    import time
+    from const import MODEL_PATH
+    from nctts_onnx.synthesizer import Syntheseizer
+
+    parser = argparse.ArgumentParser(description="windowed vocoder quality/latency check")
+    parser.add_argument("--model_path", default=MODEL_PATH)
+    parser.add_argument("--voice_id", default=None)
+    parser.add_argument("--language", default="ko_KR")
+    parser.add_argument("--emotion", default="neutral")
+    parser.add_argument("--text", default="그림자왕? 리세온? 무슨 말이야? 난... 그냥... 난 누구인지도 몰라. 이 망토도, 이 단검도... 모두 낯설기만 해.")
+    parser.add_argument("--windows", default="8,16,32,64,128")
+    parser.add_argument("--context", type=int, default=8)
+    parser.add_argument("--crossfade", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    synth = Syntheseizer(model_path=args.model_path)
+    voice_id = args.voice_id or next(iter(synth.voices))
+    feats = synth._frontend(synth.voices[voice_id]["emotion"][args.emotion], args.language, args.text)
+    mels, frames = synth._run_am([feats])
+    mels = mels[:, :, :frames[0]]
+    vocode = lambda m: synth._run_vocoder(m)[0]
+
+    def measure(window):
+        first, total = [], []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            blocks = iter_vocoder_blocks(vocode, mels, window, args.context, args.crossfade, synth.hop_length)
+            out = [next(blocks)]
+            first.append(time.perf_counter() - start)
+            out.extend(blocks)
+            total.append(time.perf_counter() - start)
+        return np.concatenate(out), min(first) * 1000, min(total) * 1000
+
+    ref, ref_first, ref_total = measure(0)
+    print(f"frames={mels.shape[-1]} context={args.context} crossfade={args.crossfade}")
+    print(f"{'window':>8} {'first_ms':>10} {'total_ms':>10} {'max_err':>10}")
+    print(f"{'full':>8} {ref_first:>10.1f} {ref_total:>10.1f} {0.0:>10.6f}")
+    for window in [int(w) for w in args.windows.split(",")]:
+        out, first_ms, total_ms = measure(window)
+        max_err = float(np.abs(out - ref).max())
+        print(f"{window:>8} {first_ms:>10.1f} {total_ms:>10.1f} {max_err:>10.6f}")
@@ -0,0 +1,86 @@
+# app/nctts_onnx/warmup.py
+"""
+모델 warm-up 에 사용하는 문장 모음.
+
+nctp language 별로 길이가 다른 문장 몇 개를 두어, 언어마다 처음 요청에서 생기는 지연
+(G2PW 초기화, pyopenjtalk 첫 호출, g2p_en 첫 POS tagging, 새 입력 길이에 대한 ORT shape 처리 등)을
+서버가 준비 완료로 바뀌기 전에 끝냅니다.
+
+WARMUP_CORPUS 또는 모델 디렉터리의 warmup.json5 로 바꿀 수 있습니다. 형식은 DEFAULT_CORPUS 와 같고,
+key 는 nctp language("korean") 또는 언어 코드("ko_KR") 입니다.
+"""
+import os
+import json5
+
+WARMUP_FILE = "warmup.json5"
+
+DEFAULT_CORPUS = {
+    "korean": [
+        "안녕하세요.",
+        "[l]하하하[/l] 그림자왕? 리세온? 무슨 말이야?",
+        "난... 그냥... 난 누구인지도 몰라. 이 망토도, 이 단검도... 모두 낯설기만 해. 우리는 내일 아침 일찍 북쪽 성문으로 출발한다.",
+    ],
+    "english": [
+        "Hello there!",
+        "How are things with you lately? I'd love to hear what you've been up to.",
+        "The northern gate opens at dawn, so get some rest while you still can. We have 3 days, 12 hours and a long road ahead of us.",
+    ],
+    "japanese": [
+        "こんにちは。",
+        "明日の朝早く、北の城門から出発します。",
+        "この外套も、この短剣も、すべて見知らぬものばかりだ。私たちは3日後の朝、北の城門から出発する。",
+    ],
+    "chinese": [
+        "你好。",
+        "我们明天一早从北门出发。",
+        "这件斗篷和这把短剑都让我感到陌生。我们3天后的早上从北门出发，路还很长。",
+    ],
+    "taiwanese": [
+        "你好。",
+        "我們明天一早從北門出發。",
+        "這件斗篷和這把短劍都讓我感到陌生。我們3天後的早上從北門出發，路還很長。",
+    ],
+}
+
+
+def load_corpus(model_path: str, path: str = "") -> dict:
+    """path → 모델 디렉터리의 warmup.json5 → DEFAULT_CORPUS 순서로 warm-up 문장 모음을 가져옵니다."""
+    if not path and os.path.isfile(os.path.join(model_path, WARMUP_FILE)):
+        path = os.path.join(model_path, WARMUP_FILE)
+    if not path:
+        return DEFAULT_CORPUS
+    with open(path, encoding="utf-8") as f:
+        return json5.load(f)
+
+
+def plan(corpus: dict, languages: dict, voices: dict):
+    """
+    [(voice_id, lang_code, text, emotion), ...] 을 만듭니다.
+    config 의 모든 언어 코드에 대해 corpus 의 문장을 한 번씩 실행하고, emotion 은 돌아가며 배정해
+    모든 emotion 이 적어도 한 번씩 실행되게 합니다. 문장이 없는 언어 코드는 missing 으로 반환합니다.
+    """
+    # emotion -> 그 emotion 을 지원하는 첫 voice
+    emotion_voice = {}
+    for voice_id, voice in voices.items():
+        for emotion, supported in voice.get("emotion", {}).items():
+            if supported and emotion not in emotion_voice:
+                emotion_voice[emotion] = voice_id
+    emotions = list(emotion_voice)
+    if not emotions:
+        return [], list(languages)
+    items, missing = [], []
+    for lang_code, lang in languages.items():
+        texts = corpus.get(lang_code) or corpus.get(lang["language"])
+        if not texts:
+            missing.append(lang_code)
+            continue
+        for text in texts:
+            emotion = emotions[len(items) % len(emotions)]
+            items.append((emotion_voice[emotion], lang_code, text, emotion))
+    # 문장 수가 emotion 수보다 적으면 남은 emotion 은 첫 문장으로 실행
+    covered = {item[3] for item in items}
+    if items:
+        for emotion in emotions:
+            if emotion not in covered:
+                items.append((emotion_voice[emotion], items[0][1], items[0][2], emotion))
+    return items, missing
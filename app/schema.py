@@ -1,7 +1,28 @@
 from pydantic import BaseModel, Field
+from const import BATCH_MAX_ITEMS
+from typing import List, Literal, Optional
 
 class Reqinvocations(BaseModel):
+    model: Optional[str] = Field(None, description="Name of the hosted model (MODEL_PATHS). Defaults to the first one", example="standard")
     voice_id: str  = Field( description="Voice ID", example="39251bb8-8cea-59f1-9f3b-e4f255b8875b")
     language: str = Field( description="Text language", example="en_US")
     emotion: str = Field("neutral", description="emotion", example="neutral")
-    text: str = Field( description="Text to synthesize into speech",example="How are things with you lately? I’d love to hear what you’ve been up to.")
\ No newline at end of file
+    text: str = Field( description="Text to synthesize into speech",example="How are things with you lately? I’d love to hear what you’ve been up to.")
+    stream: bool = Field(False, description="Stream audio sentence by sentence as soon as each sentence is synthesized", example=False)
+    container: Literal["wav", "pcm"] = Field("wav", description="Audio container. 'pcm' is headerless little-endian samples in sample_format", example="wav")
+    sample_format: Literal["float32", "int16"] = Field("float32", description="PCM sample format. 'int16' halves the response size", example="int16")
+    sample_rate: Optional[Literal[8000, 16000, 22050, 24000, 32000, 44100, 48000]] = Field(None, description="Output sample rate in Hz. Defaults to the model's native rate (44100)", example=24000)
+
+class ReqBatchItem(BaseModel):
+    id: Optional[str] = Field(None, description="Client-side identifier echoed back in the manifest", example="scene01-bark03")
+    voice_id: str  = Field( description="Voice ID", example="39251bb8-8cea-59f1-9f3b-e4f255b8875b")
+    language: str = Field( description="Text language", example="en_US")
+    emotion: str = Field("neutral", description="emotion", example="neutral")
+    text: str = Field( description="Text to synthesize into speech", example="Over here!")
+
+class ReqinvocationsBatch(BaseModel):
+    model: Optional[str] = Field(None, description="Name of the hosted model (MODEL_PATHS). Defaults to the first one", example="standard")
+    items: List[ReqBatchItem] = Field( description="Lines to synthesize", min_length=1, max_length=BATCH_MAX_ITEMS)
+    container: Literal["wav", "pcm"] = Field("wav", description="Audio container of each archived file", example="wav")
+    sample_format: Literal["float32", "int16"] = Field("float32", description="PCM sample format. 'int16' halves the response size", example="int16")
+    sample_rate: Optional[Literal[8000, 16000, 22050, 24000, 32000, 44100, 48000]] = Field(None, description="Output sample rate in Hz. Defaults to the model's native rate (44100)", example=24000)
@@ -0,0 +1,50 @@
+# app/singleflight.py
+import asyncio
+from nctts_onnx.cancel import CancelToken, SynthCancelled, wait_or_cancel
+
+
+class SingleFlight:
+    """
+    같은 key 의 요청이 동시에 들어오면 첫 요청(leader)만 실행하고, 나머지는 그 결과(또는 예외)를 함께 받습니다.
+    실행은 별도 task 로 돌리므로 leader 의 클라이언트가 먼저 끊어도 기다리는 다른 요청은 영향을 받지 않습니다.
+    공유 실행에는 별도의 CancelToken 을 넘기며, 기다리는 요청이 모두 취소(연결 끊김/deadline)되었을 때만 취소합니다.
+    이벤트 루프 안에서만 사용합니다. (lock 불필요)
+    """
+    def __init__(self):
+        self._inflight = {}  # key -> {"task", "token", "waiters"}
+        self._leaders = 0
+        self._coalesced = 0
+
+    async def do(self, key, fn, *args, token: CancelToken = None):
+        """fn(*args, token=공유 token) 을 실행하거나 진행 중인 실행에 합류합니다."""
+        flight = self._inflight.get(key)
+        if flight is None:
+            self._leaders += 1
+            shared = CancelToken()
+            flight = {"task": asyncio.ensure_future(fn(*args, token=shared)), "token": shared, "waiters": 0}
+            self._inflight[key] = flight
+
+            def done(_, flight=flight):
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            flight["task"].add_done_callback(done)
+        else:
+            self._coalesced += 1
+        flight["waiters"] += 1
+        try:
+            return await wait_or_cancel(asyncio.shield(flight["task"]), token)
+        except (SynthCancelled, asyncio.CancelledError) as e:
+            flight["waiters"] -= 1
+            if flight["waiters"] == 0 and not flight["task"].done():
+                flight["token"].cancel(getattr(e, "reason", "disconnected"))
+                # 취소된 실행이 끝나기 전에 들어온 같은 key 의 요청은 새로 실행합니다.
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            raise
+
+    def stats(self) -> dict:
+        return {
+            "inflight": len(self._inflight),
+            "leaders": self._leaders,
+            "coalesced": self._coalesced,
+        }
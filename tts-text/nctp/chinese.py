@@ -1,28 +1,37 @@
 
 from unidecode import unidecode
-from tn.chinese.normalizer import Normalizer
 from nctp.dictionary.chi_pid_sDict import chi_dict
-from tn.chinese.normalizer import Normalizer
-from nctp.ncg2pc.prosody_predictor import ProsodyPredictor
-from nctp.ncg2pc.chinese_handler import ChineseProcessor
 import re
 import os
-
+import threading
 CHI_SYMBOLS = list(chi_dict.keys())
 NCTTS_TM = os.environ.get("NCTTS_TM")
 
-normalizer = Normalizer()
-try:
-    fp_prosody = f"{NCTTS_TM}/chinese_processor/prosody2id.txt"
-    fp_polyphone = f"{NCTTS_TM}/chinese_processor/polyphone_phone.txt"
-    fp_model  =f"{NCTTS_TM}/chinese_processor/19.pt"
-    prosody_predictor = ProsodyPredictor(fp_prosody=fp_prosody, fp_polyphone=fp_polyphone, fp_model=fp_model)
-    try:
-        del artifactory_obj
-    except: pass
-except Exception as e:
-    print(e)
-    raise FileNotFoundError("필수 체크포인트를 먼저 다운로드 하세요")
+# WeTextProcessing Normalizer 와 bert-base-chinese ProsodyPredictor 는 import 시점이 아니라
+# 이 언어의 TextProcessor 를 만들 때(init_resources) 한 번만 생성합니다.
+normalizer = None
+prosody_predictor = None
+_init_lock = threading.Lock()
+
+
+def init_resources():
+    global normalizer, prosody_predictor
+    if prosody_predictor is not None:
+        return
+    with _init_lock:
+        if prosody_predictor is not None:
+            return
+        from tn.chinese.normalizer import Normalizer
+        from nctp.ncg2pc.prosody_predictor import ProsodyPredictor
+        normalizer = Normalizer()
+        try:
+            fp_prosody = f"{NCTTS_TM}/chinese_processor/prosody2id.txt"
+            fp_polyphone = f"{NCTTS_TM}/chinese_processor/polyphone_phone.txt"
+            fp_model  = f"{NCTTS_TM}/chinese_processor/19.pt"
+            prosody_predictor = ProsodyPredictor(fp_prosody=fp_prosody, fp_polyphone=fp_polyphone, fp_model=fp_model)
+        except Exception as e:
+            print(e)
+            raise FileNotFoundError("필수 체크포인트를 먼저 다운로드 하세요")
 
 PROSODY_LABEL = re.compile(r"#[0-9]")
 
@@ -69,6 +78,7 @@ def handle_baker_like(text):
     text = text.replace("。", ".").replace("，", ",").replace("、", ",").replace("？", "?").replace("！", "!").replace("：", ",").replace("；", ",")
     han, phn = text.split("|")
     # proc = ChineseProcessor()
+    from nctp.ncg2pc.chinese_handler import ChineseProcessor
     sym = ChineseProcessor.get_phoneme_from_char_and_pinyin(han, phn.split(" "))
     return sym
 
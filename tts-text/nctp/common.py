@@ -1,5 +1,6 @@
 import re
 import logging
+import importlib
 import jamo
 
 import unicodedata
@@ -11,8 +12,6 @@ from typing import List
 
 import nctp.korean as knorm
 import nctp.english as enorm
-import nctp.chinese as cnorm
-import nctp.taiwanese as tnorm
 import nctp.japanese as jnorm
 from nctp.symbols import CommonSymbols, ERR_SYMBOL, SpecialSymbols
 
@@ -404,7 +403,37 @@ class Normalizer:
         self._normalize = normalize
         self._args = args
 
+    def prepare(self):
+        """TextProcessor 생성 시 호출. 필요한 자원을 미리 준비합니다."""
+        pass
+
+    def normalize(self, target: str) -> str:
+        return self._normalize(target, *self._args)
+
+
+class LazyNormalizer(Normalizer):
+    """
+    언어 모듈(nctp.chinese 등)을 처음 사용할 때 import 하고, 모듈의 init_resources() 로
+    Normalizer / ProsodyPredictor 같은 무거운 자원을 만듭니다.
+    해당 언어의 TextProcessor 를 만들지 않으면 모듈을 import 하지 않습니다.
+    resources=False 이면 자원 없이 동작하는 함수(정규식 처리 등)이므로 init_resources() 를 호출하지 않습니다.
+    """
+    def __init__(self, module: str, name: str, *args, resources: bool = True):
+        self._module = module
+        self._name = name
+        self._args = args
+        self._resources = resources
+        self._normalize = None
+
+    def prepare(self):
+        if self._normalize is None:
+            module = importlib.import_module(self._module)
+            if self._resources:
+                module.init_resources()
+            self._normalize = getattr(module, self._name)
+
     def normalize(self, target: str) -> str:
+        self.prepare()
         return self._normalize(target, *self._args)
 
 
@@ -437,20 +466,20 @@ class NormalizeStep(Enum):
     expand_abbreviations = Normalizer(enorm.expand_abbreviations)
 
     # Chinese step
-    chn_normalize = Normalizer(cnorm.chn_normalize)
-    remove_prosody = Normalizer(cnorm.remove_prosody)
-    chn_prosody = Normalizer(cnorm.prosody_predict)
-    chn_baker = Normalizer(cnorm.handle_baker_like)
+    chn_normalize = LazyNormalizer('nctp.chinese', 'chn_normalize')
+    remove_prosody = LazyNormalizer('nctp.chinese', 'remove_prosody', resources=False)    # 대만어 step 에서도 사용
+    chn_prosody = LazyNormalizer('nctp.chinese', 'prosody_predict')
+    chn_baker = LazyNormalizer('nctp.chinese', 'handle_baker_like')
 
     remove_quotation = Normalizer(remove_quotation)
     convert_enumeration = Normalizer(convert_enumeration)
     remove_bracket = Normalizer(remove_bracket)
 
     # Taiwanese step
-    twn_normalize = Normalizer(tnorm.twn_normalize)
-    twn_normalize_new = Normalizer(tnorm.twn_normalize_new)
-    twn_prosody = Normalizer(tnorm.prosody_predict)
-    twn_baker = Normalizer(tnorm.handle_baker_like)
+    twn_normalize = LazyNormalizer('nctp.taiwanese', 'twn_normalize')
+    twn_normalize_new = LazyNormalizer('nctp.taiwanese', 'twn_normalize_new')
+    twn_prosody = LazyNormalizer('nctp.taiwanese', 'prosody_predict')
+    twn_baker = LazyNormalizer('nctp.taiwanese', 'handle_baker_like')
 
     # Japanese Normalize
     jpn_num_normalize = Normalizer(jnorm.convert_number_to_hiragana_in_text)
@@ -1,6 +1,5 @@
 import re
 from unidecode import unidecode
-import inflect
 import string
 
 from nctp.dictionary.eng_pid_sDict import eng_arpabet_dict, eng_ipa_dict
@@ -106,7 +105,18 @@ def _get_alphabet(m):
 """
 regex argument for normalize_numbers()
 """
-_inflect = inflect.engine()
+_inflect_engine = None
+
+
+def _inflect():
+    """inflect 는 import 와 engine 생성이 무거우므로 숫자를 처음 읽을 때 만듭니다."""
+    global _inflect_engine
+    if _inflect_engine is None:
+        import inflect
+        _inflect_engine = inflect.engine()
+    return _inflect_engine
+
+
 _comma_number_re = re.compile(r'([0-9][0-9\,]+[0-9])')
 _decimal_number_re = re.compile(r'([0-9]+\.[0-9]+)')
 _pounds_re = re.compile(r'£([0-9\,]*[0-9]+)')
@@ -161,7 +171,7 @@ def _expand_ordinal(m):
     서수를 읽을 수 있는 형태로 변환함
     used for regex argument
     """
-    return _inflect.number_to_words(m.group(0))
+    return _inflect().number_to_words(m.group(0))
 
 
 def _expand_number(m):
@@ -174,13 +184,13 @@ def _expand_number(m):
         if num == 2000:
             return 'two thousand'
         elif num > 2000 and num < 2010:
-            return 'two thousand ' + _inflect.number_to_words(num % 100)
+            return 'two thousand ' + _inflect().number_to_words(num % 100)
         elif num % 100 == 0:
-            return _inflect.number_to_words(num // 100) + ' hundred'
+            return _inflect().number_to_words(num // 100) + ' hundred'
         else:
-            return _inflect.number_to_words(num, andword='', zero='oh', group=2).replace(', ', ' ')
+            return _inflect().number_to_words(num, andword='', zero='oh', group=2).replace(', ', ' ')
     else:
-        return _inflect.number_to_words(num, andword='')
+        return _inflect().number_to_words(num, andword='')
 
 
 def normalize_numbers(text):
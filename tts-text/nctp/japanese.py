@@ -4,10 +4,10 @@ from nctp.dictionary.jpn_pid_sDict import jpn_prosody_dict
 JPN_SYMBOLS = list(jpn_prosody_dict.keys())
 
 
-import kanjize
 import re
 
 def convert_number_to_hiragana_in_text(text):
+    import kanjize  # 일본어 step 에서만 필요
     def replace_number_with_kanji(match):
         num_str = match.group(0)
         if '.' in num_str:
@@ -16,6 +16,9 @@
 
 import os
 import re
+import time
+import logging
+import threading
 from typing import Dict, List, Union, Tuple, Any
 
 import librosa
@@ -578,11 +581,50 @@ def is_zh(word):
     return match is not None
 
 
+# G2PWPinyin 은 BERT 를 포함하므로 프로세스에서 한 번만 만들고 모든 TaiwaneseProcessor 가 공유합니다.
+_g2pw = None
+_g2pw_lock = threading.Lock()
+_g2pw_state = {"status": "idle", "seconds": None, "error": None}
+
+
+def init_g2pw():
+    """G2PWPinyin 을 (처음 한 번만) 만들어 반환합니다. 동시에 호출되어도 한 번만 만듭니다."""
+    global _g2pw
+    if _g2pw is not None:
+        return _g2pw
+    with _g2pw_lock:
+        if _g2pw is not None:
+            return _g2pw
+        _g2pw_state.update(status="loading", error=None)
+        logging.info("G2P module initializing... This function runs only once per process.")
+        start = time.perf_counter()
+        NCTTS_TM = os.environ.get("NCTTS_TM")
+        try:
+            model_dir = f"{NCTTS_TM}/taiwanese_processor/G2PWModel/"
+            model_source = f"{NCTTS_TM}/taiwanese_processor/G2PWModel/bert-base-chinese/"
+            g2pw = G2PWPinyin(model_dir=model_dir,
+                    model_source=model_source,
+                    v_to_u=False, neutral_tone_with_five=True)
+        except:
+            _g2pw_state.update(status="failed", error="checkpoint not found.")
+            raise FileNotFoundError("필수 체크포인트를 먼저 다운로드 하세요")
+        _g2pw_state.update(status="ready", seconds=round(time.perf_counter() - start, 3))
+        _g2pw = g2pw
+        return _g2pw
+
+
+def g2pw_status() -> dict:
+    """G2PW 준비 상태. status: idle / loading / ready / failed"""
+    return dict(_g2pw_state)
+
+
 class TaiwaneseProcessor(ChineseProcessor):
     def __init__(self,):
         super().__init__()
         # artifactory
         self.pinyin_dict.update(**TWN_PINYIN_DICT)
+        # 첫 요청에서 G2PW 를 만들지 않도록 생성 시점에 준비 (TextProcessor 생성 = 모델 로드 중)
+        self.pinyin_parser = self.get_pinyin_parser()
     
     def get_pinyin_parser(self):
         self.init_g2pw()
@@ -590,19 +632,7 @@ class TaiwaneseProcessor(ChineseProcessor):
         return pinyin
     
     def init_g2pw(self):
-        print("G2P module initializing... This function runs only once when TTS is run for the first time.")
-        NCTTS_TM = os.environ.get("NCTTS_TM")
-        try:
-            model_dir = f"{NCTTS_TM}/taiwanese_processor/G2PWModel/"
-            model_source = f"{NCTTS_TM}/taiwanese_processor/G2PWModel/bert-base-chinese/"
-            self.g2pw = G2PWPinyin(model_dir=model_dir,
-                    model_source=model_source,
-                    v_to_u=False, neutral_tone_with_five=True)
-            try:
-                del artifactory_obj
-            except: pass
-        except:
-            raise FileNotFoundError("필수 체크포인트를 먼저 다운로드 하세요")
+        self.g2pw = init_g2pw()
         
     
 if __name__ == "__main__":
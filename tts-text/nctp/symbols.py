@@ -4,8 +4,9 @@ from nctp.english import EN_SYMBOLS
 from nctp.english import EN_PHN_SYMBOLS
 from nctp.english import EN_IPA_SYMBOLS
 from nctp.japanese import JPN_SYMBOLS
-from nctp.chinese import CHI_SYMBOLS
-from nctp.taiwanese import TWN_SYMBOLS
+# nctp.chinese / nctp.taiwanese 를 import 하지 않도록 symbol 목록은 사전에서 바로 가져옵니다.
+from nctp.dictionary.chi_pid_sDict import chi_dict
+from nctp.dictionary.twn_pid_sDict import twn_dict
 
 import logging
 import jamo
@@ -133,7 +134,7 @@ class JapanesePhnSymbols(BaseSymbols):
 
 class ChinesePhnSymbols(BaseSymbols):
     def __init__(self):
-        self._symbols = CHI_SYMBOLS
+        self._symbols = list(chi_dict.keys())
         self._offset = len(CommonSymbols().sym2num.keys()) + len(SpecialSymbols().sym2num.keys())
 
     def _valid_checker(self, cphn_symbols):
@@ -145,7 +146,7 @@ class ChinesePhnSymbols(BaseSymbols):
 
 class TaiwanesePhnSymbols(BaseSymbols):
     def __init__(self):
-        self._symbols = TWN_SYMBOLS
+        self._symbols = list(twn_dict.keys())
         self._offset = len(CommonSymbols().sym2num.keys()) + len(SpecialSymbols().sym2num.keys())
 
     def _valid_checker(self, tphn_symbols):
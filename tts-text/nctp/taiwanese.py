@@ -1,26 +1,36 @@
 
 from unidecode import unidecode
-from tn.chinese.normalizer import Normalizer
 from nctp.dictionary.twn_pid_sDict import twn_dict
-from tn.chinese.normalizer import Normalizer
-from nctp.ncg2pt.prosody_predictor import ProsodyPredictor
-from nctp.ncg2pt.taiwanese_handler import TaiwaneseProcessor
 import re
 import os
+import threading
 TWN_SYMBOLS = list(twn_dict.keys())
 NCTTS_TM = os.environ.get("NCTTS_TM")
 
-normalizer = Normalizer(traditional_to_simple=False)
-try:
-    fp_prosody = f"{NCTTS_TM}/taiwanese_processor/prosody2id.txt"
-    fp_polyphone = f"{NCTTS_TM}/taiwanese_processor/polyphone_phone.txt"
-    fp_model  = f"{NCTTS_TM}/taiwanese_processor/19.pt"
-    prosody_predictor = ProsodyPredictor(fp_prosody=fp_prosody, fp_polyphone=fp_polyphone, fp_model=fp_model)
-    try:
-        del artifactory_obj
-    except: pass
-except:
-    raise FileNotFoundError("필수 체크포인트를 먼저 다운로드 하세요")
+# WeTextProcessing Normalizer 와 bert-base-chinese ProsodyPredictor 는 import 시점이 아니라
+# 이 언어의 TextProcessor 를 만들 때(init_resources) 한 번만 생성합니다.
+normalizer = None
+prosody_predictor = None
+_init_lock = threading.Lock()
+
+
+def init_resources():
+    global normalizer, prosody_predictor
+    if prosody_predictor is not None:
+        return
+    with _init_lock:
+        if prosody_predictor is not None:
+            return
+        from tn.chinese.normalizer import Normalizer
+        from nctp.ncg2pt.prosody_predictor import ProsodyPredictor
+        normalizer = Normalizer(traditional_to_simple=False)
+        try:
+            fp_prosody = f"{NCTTS_TM}/taiwanese_processor/prosody2id.txt"
+            fp_polyphone = f"{NCTTS_TM}/taiwanese_processor/polyphone_phone.txt"
+            fp_model  = f"{NCTTS_TM}/taiwanese_processor/19.pt"
+            prosody_predictor = ProsodyPredictor(fp_prosody=fp_prosody, fp_polyphone=fp_polyphone, fp_model=fp_model)
+        except:
+            raise FileNotFoundError("필수 체크포인트를 먼저 다운로드 하세요")
 
 PROSODY_LABEL = re.compile(r"#[0-9]")
 
@@ -96,6 +106,7 @@ def handle_baker_like(text):
     text = re.sub(QUATO, "", text)
     text = text.replace("。", ".").replace("，", ",").replace("、", ",").replace("？", "?").replace("！", "!").replace("：", ",").replace("；", ",").replace("；", ",")
     han, phn = text.split("|")
+    from nctp.ncg2pt.taiwanese_handler import TaiwaneseProcessor
     sym = TaiwaneseProcessor.get_phoneme_from_char_and_pinyin(han, phn.split(" "))
     return sym
 
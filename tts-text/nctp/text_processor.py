@@ -2,7 +2,6 @@ import logging
 import re
 import os
 import numpy as np
-import fasttext
 from typing import Dict, List, Tuple, Union, Callable
 import importlib.util
 # from googletrans import Translator
@@ -80,6 +79,9 @@ class TextProcessor:
     def _set_env(self, language, normalize_step):
         self._language = language
         self._nstep = steps.step_selector(language, normalize_step)
+        # 이 언어의 step 이 쓰는 자원(중국어/대만어 Normalizer, ProsodyPredictor 등)은 여기서 한 번만 생성
+        for step in self._nstep:
+            step.value.prepare()
         self._symbols = {k: v for k, v in TextProcessor.LANG2SYMBOL[language].items()}
         self._val2syms = {v: k for k, v in self._symbols.items()}
         self._symbolizer = symbolizer_selector(language)
@@ -501,7 +503,7 @@ def get_language_detector(light=True):
     # package_path = "/".join(importlib.util.find_spec("nctp").origin.split("/")[:-2] + [f"lid.176.{ext}"])
     package_path = f"{NCTTS_TM}/language_detector/lid.176.{ext}"
 
-
+    import fasttext  # 언어 감지를 쓸 때만 필요
     model = fasttext.load_model(package_path)
     return model
 